@@ -6,27 +6,40 @@ Provides REST API endpoints for the Electron frontend
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, JSONResponse, Response, FileResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set, Tuple
 import asyncio
 import json
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from functools import lru_cache, partial
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+import hashlib
 import os
 import sys
+import time
+import traceback
+
+try:
+    import msgpack
+except ImportError:  # Optional: binary responses for clients that ask for them
+    msgpack = None
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 try:
     # Import your existing modules
-    from backend.core.scanner import scan_directory, analyze_folder_structure
-    from backend.core.prompt_generator import generate_konmari_prompt, save_prompt
-    from backend.core.organizer import perform_file_moves, load_plan, validate_plan
-    from backend.core.backup import create_full_backup, revert_organization, list_backups
+    from backend.core.scanner import scan_directory, analyze_folder_structure, tree_stats
+    from backend.core.prompt_generator import iter_konmari_prompt, save_prompt_stream
+    from backend.core.organizer import load_plan, perform_file_moves, validate_plan
+    from backend.core.backup import create_full_backup, create_backup_manifest, revert_organization, list_backups
     from backend.config.settings import Config
+    from backend.api.task_store import create_task_store
+    from backend.utils.fileio import dumps_json, loads_json, atomic_write
 except ImportError as e:
     print(f"⚠️  Import error: {e}")
     print("Make sure all required modules are in the same directory as api.py")
@@ -48,9 +61,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Task storage (in production, use Redis or similar)
-tasks: Dict[str, Dict[str, Any]] = {}
-scan_results: Dict[str, Any] = {}
+def scan_results_path(task_id: str) -> Path:
+    """Path of the saved results for a scan task"""
+    return Path("data") / f"scan_results_{task_id}.json"
+
+def write_scan_results(task_id: str, scan_result: Dict[str, Any]):
+    """Save scan results for a task and as the latest scan (runs in the I/O pool)"""
+    payload = dumps_json(scan_result)
+    atomic_write(scan_results_path(task_id), payload)
+    atomic_write("data/scan_results.json", payload)
+
+def discard_scan_results(task_id: str):
+    """Remove saved scan results when their task is evicted"""
+    task_errors.pop(task_id, None)
+    try:
+        scan_results_path(task_id).unlink()
+    except OSError:
+        pass
+
+# Captured (unformatted) tracebacks of failed tasks, rendered only on request
+task_errors: Dict[str, traceback.TracebackException] = {}
+
+# Task storage (bounded in memory, so the API runs as a single worker)
+tasks = create_task_store(on_evict=discard_scan_results)
+
+# One event per open SSE stream, set whenever its task is updated
+task_listeners: Dict[str, Set[asyncio.Event]] = {}
+SSE_HEARTBEAT_SECONDS = 15
+
+# Scans in progress by (resolved path, max_files), so repeated clicks share one task.
+# Checked and set without awaiting in between, so no lock is needed on the event loop.
+inflight_scans: Dict[Tuple[str, int], str] = {}
+
+# Most recent completed scan as (key, folder mtime_ns at start, finished at, task_id).
+# Only the latest scan is reused, since data/scan_results.json holds its results.
+last_scan: Optional[Tuple[Tuple[str, int], int, float, str]] = None
+
+def recent_scan_task(key: Tuple[str, int], path: Path) -> Optional[str]:
+    """Task ID of a just-finished scan of an unchanged folder, if any"""
+    if last_scan is None:
+        return None
+    scan_key, mtime_ns, finished_at, task_id = last_scan
+    if scan_key != key or time.monotonic() - finished_at > Config.SCAN_REUSE_SECONDS:
+        return None
+    if path.stat().st_mtime_ns != mtime_ns or task_id not in tasks:
+        return None
+    return task_id
+
+def forget_last_scan():
+    """Stop reusing the last scan once files are about to move"""
+    global last_scan
+    last_scan = None
+
+# Thread pool for blocking file system work (scans, moves, file writes)
+IO_POOL = ThreadPoolExecutor(max_workers=Config.API_IO_THREADS, thread_name_prefix="fileorg-io")
+
+@app.on_event("startup")
+async def prepare_data_dirs():
+    """Create the data and log folders once instead of on every write"""
+    for folder in ("data", "data/backup_archives", "logs"):
+        os.makedirs(folder, exist_ok=True)
+
+@app.on_event("startup")
+async def use_io_pool():
+    """Route default executor work through the I/O pool"""
+    asyncio.get_running_loop().set_default_executor(IO_POOL)
+
+@app.on_event("shutdown")
+async def shutdown_io_pool():
+    """Stop the I/O pool threads"""
+    IO_POOL.shutdown(wait=False)
 
 # Request/Response Models
 class ScanRequest(BaseModel):
@@ -94,37 +174,105 @@ class TaskStatusResponse(BaseModel):
 def create_task(task_type: str) -> str:
     """Create a new task and return its ID"""
     task_id = str(uuid.uuid4())
-    tasks[task_id] = {
+    tasks.set(task_id, {
         "type": task_type,
         "status": "pending",
         "progress": 0.0,
         "message": f"Initializing {task_type}...",
         "result": None,
         "error": None,
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat()
-    }
+        # Raw clock reads; formatted only at the API boundary. updated_at_ns is
+        # monotonic (the SSE change marker), updated_at_wall_ns is the reported time
+        "created_at_ns": time.time_ns(),
+        "updated_at_ns": time.monotonic_ns(),
+        "updated_at_wall_ns": time.time_ns()
+    })
     return task_id
 
+def fail_task(task_id: str, exc: Exception, message: str):
+    """Mark a task as failed, keeping its traceback for verbose status requests"""
+    # lookup_lines=False defers reading source lines until the traceback is formatted
+    task_errors[task_id] = traceback.TracebackException.from_exception(exc, lookup_lines=False)
+    update_task(task_id, status="failed", error=str(exc), message=message)
+
+def format_task_error(task_id: str, task: Dict[str, Any]) -> Optional[str]:
+    """Task error with its full traceback, if one was captured"""
+    captured = task_errors.get(task_id)
+    if captured is None:
+        return task.get("error")
+    return "".join(captured.format())
+
+def iso_from_ns(timestamp_ns: int) -> str:
+    """Format a time.time_ns() timestamp as ISO 8601 (UTC)"""
+    return datetime.fromtimestamp(timestamp_ns / 1e9, tz=timezone.utc).isoformat()
+
+def task_payload(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Task as sent to clients, with the internal timestamps formatted"""
+    payload = {key: value for key, value in task.items() if not key.endswith("_ns")}
+    payload["created_at"] = iso_from_ns(task["created_at_ns"])
+    payload["updated_at"] = iso_from_ns(task["updated_at_wall_ns"])
+    return payload
+
 def update_task(task_id: str, **kwargs):
     """Update task status"""
-    if task_id in tasks:
-        tasks[task_id].update(kwargs)
-        tasks[task_id]["updated_at"] = datetime.now().isoformat()
+    tasks.update(task_id, updated_at_ns=time.monotonic_ns(), updated_at_wall_ns=time.time_ns(), **kwargs)
+    for listener in task_listeners.get(task_id, ()):
+        listener.set()
+
+# HTTP caching helpers for read-mostly endpoints polled by the UI
+def cache_headers(etag: str, max_age: int = 0, last_modified: Optional[float] = None) -> Dict[str, str]:
+    """Build ETag/Cache-Control (and optionally Last-Modified) headers"""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max_age}" if max_age else "no-cache",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return headers
+
+# MessagePack content negotiation (JSON stays the default for curl/debugging)
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+def wants_msgpack(request: Request) -> bool:
+    """Check whether the client asked for MessagePack and it is available"""
+    return msgpack is not None and MSGPACK_MEDIA_TYPE in request.headers.get("accept", "")
+
+def msgpack_response(obj: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Encode an object as a MessagePack response"""
+    return Response(msgpack.packb(obj, use_bin_type=True), media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Check whether the client already holds the current representation"""
+    return etag in request.headers.get("if-none-match", "")
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag derived from the response body"""
+    return f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+def cached_json_response(request: Request, body: bytes, etag: Optional[str] = None,
+                         max_age: int = 0, last_modified: Optional[float] = None) -> Response:
+    """JSON response with cache headers, or 304 if the client's copy is current"""
+    etag = etag or body_etag(body)
+    headers = cache_headers(etag, max_age, last_modified)
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
 
 # Background task workers
-async def scan_directory_async(task_id: str, path: str, max_files: int):
+async def scan_directory_async(task_id: str, path: str, max_files: int, key: Tuple[str, int]):
     """Async wrapper for directory scanning"""
+    global last_scan
     try:
+        started_mtime_ns = os.stat(path).st_mtime_ns
         print(f"🔍 Starting scan for task {task_id} at path: {path}")
         update_task(task_id, status="running", progress=0.1, message="Analyzing folder structure...")
         
         # Run in thread pool to avoid blocking
-        import asyncio
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         
-        # Analyze folder structure in thread
-        analysis = await loop.run_in_executor(None, analyze_folder_structure, path)
+        # Analyze folder structure in thread; the scan below reuses the same walk
+        tree = await loop.run_in_executor(IO_POOL, tree_stats, path)
+        analysis = await loop.run_in_executor(IO_POOL, partial(analyze_folder_structure, path, tree=tree))
         print(f"📊 Analysis complete: {analysis['total_files']} files found")
         update_task(task_id, progress=0.3, message=f"Found {analysis['total_files']} files...")
         
@@ -133,7 +281,7 @@ async def scan_directory_async(task_id: str, path: str, max_files: int):
         update_task(task_id, progress=0.5, message="Scanning files...")
         
         # Perform scan in thread
-        files = await loop.run_in_executor(None, scan_directory, path, max_files)
+        files = await loop.run_in_executor(IO_POOL, partial(scan_directory, path, max_files, tree=tree))
         print(f"✅ Scan complete: {len(files)} files scanned")
         
         # Store results
@@ -144,12 +292,8 @@ async def scan_directory_async(task_id: str, path: str, max_files: int):
             "files": files
         }
         
-        scan_results[task_id] = scan_result
-        
-        # Save to disk
-        os.makedirs("data", exist_ok=True)
-        with open("data/scan_results.json", "w") as f:
-            json.dump(scan_result, f, indent=2)
+        # Save to disk in one pool submission (the task keeps only the path, not the files)
+        await loop.run_in_executor(IO_POOL, write_scan_results, task_id, scan_result)
         
         update_task(task_id, 
                    status="completed", 
@@ -160,28 +304,27 @@ async def scan_directory_async(task_id: str, path: str, max_files: int):
                        "organized_folders": len(analysis.get("organized_folders", [])),
                        "file_types": analysis.get("file_types", {})
                    })
+        last_scan = (key, started_mtime_ns, time.monotonic(), task_id)
         
     except Exception as e:
-        import traceback
-        error_details = f"{str(e)}\n{traceback.format_exc()}"
-        print(f"❌ Scan failed: {error_details}")
-        update_task(task_id, 
-                   status="failed", 
-                   error=error_details,
-                   message=f"Scan failed: {str(e)}")
+        print(f"❌ Scan failed: {e}")
+        fail_task(task_id, e, f"Scan failed: {str(e)}")
+    finally:
+        if inflight_scans.get(key) == task_id:
+            del inflight_scans[key]
 
 async def generate_prompt_async(task_id: str, path: str):
     """Async wrapper for prompt generation"""
     try:
         update_task(task_id, status="running", progress=0.2, message="Loading scan results...")
         
-        # Generate prompt
-        update_task(task_id, progress=0.5, message="Generating organization prompt...")
-        prompt = generate_konmari_prompt(path)
+        loop = asyncio.get_running_loop()
         
-        # Save prompt
-        update_task(task_id, progress=0.8, message="Saving prompt...")
-        prompt_file = save_prompt(prompt)
+        # Generate the prompt and write it to disk as it is produced
+        update_task(task_id, progress=0.5, message="Generating organization prompt...")
+        prompt_file, preview, prompt_length = await loop.run_in_executor(
+            IO_POOL, save_prompt_stream, iter_konmari_prompt(path)
+        )
         
         update_task(task_id,
                    status="completed",
@@ -189,48 +332,44 @@ async def generate_prompt_async(task_id: str, path: str):
                    message="Prompt generated successfully!",
                    result={
                        "prompt_file": str(prompt_file),
-                       "prompt_length": len(prompt),
-                       "prompt_preview": prompt[:500] + "..."
+                       "prompt_length": prompt_length,
+                       "prompt_preview": preview + "..."
                    })
         
     except Exception as e:
-        update_task(task_id,
-                   status="failed",
-                   error=str(e),
-                   message=f"Prompt generation failed: {str(e)}")
+        fail_task(task_id, e, f"Prompt generation failed: {str(e)}")
 
 async def organize_files_async(task_id: str, path: str, dry_run: bool):
     """Async wrapper for file organization"""
     try:
         update_task(task_id, status="running", progress=0.1, message="Loading organization plan...")
         
-        # Import here to avoid circular import
-        from backend.core.organizer import create_backup_manifest
+        # Loading, validating (a stat per source) and backing up (a hash per file)
+        # all block, so they run in the thread pool like the moves themselves
+        loop = asyncio.get_running_loop()
         
         # Load plan
-        plan_response = await load_plan()
-        plan =  plan_response['plan'] 
+        plan = await loop.run_in_executor(IO_POOL, load_plan)
         total_moves = len(plan.get("moves", []))
         
         update_task(task_id, progress=0.2, message=f"Validating {total_moves} moves...")
         
         # Validate plan
-        issues = validate_plan(plan, path)
+        issues = await loop.run_in_executor(IO_POOL, validate_plan, plan, path)
         if issues:
             raise ValueError(f"Plan validation failed: {'; '.join(issues)}")
         
         # Create backup if not dry run
         if not dry_run:
+            forget_last_scan()
             update_task(task_id, progress=0.3, message="Creating backup manifest...")
-            create_backup_manifest(path, plan)
+            await loop.run_in_executor(IO_POOL, create_backup_manifest, path, plan)
         
         # Execute moves with progress tracking
         update_task(task_id, progress=0.4, message=f"{'Simulating' if dry_run else 'Moving'} files...")
         
         # Run in thread pool
-        import asyncio
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, perform_file_moves, path, plan, dry_run)
+        result = await loop.run_in_executor(IO_POOL, perform_file_moves, path, plan, dry_run)
         
         update_task(task_id,
                    status="completed",
@@ -243,12 +382,7 @@ async def organize_files_async(task_id: str, path: str, dry_run: bool):
                    })
         
     except Exception as e:
-        import traceback
-        error_details = f"{str(e)}\n{traceback.format_exc()}"
-        update_task(task_id,
-                   status="failed",
-                   error=error_details,
-                   message=f"Organization failed: {str(e)}")
+        fail_task(task_id, e, f"Organization failed: {str(e)}")
 
 # API Endpoints
 @app.get("/")
@@ -270,15 +404,30 @@ async def scan_folder(request: ScanRequest, background_tasks: BackgroundTasks):
     if not path.is_dir():
         raise HTTPException(status_code=400, detail="Path is not a directory")
     
+    key = (str(path.resolve()), request.max_files)
+    
+    # Join a scan of the same folder that is still running
+    task_id = inflight_scans.get(key)
+    task = tasks.get(task_id) if task_id else None
+    if task is not None and task["status"] in ("pending", "running"):
+        return TaskResponse(task_id=task_id, status=task["status"], message="Scan already in progress")
+    
+    # Reuse a scan that finished moments ago if the folder is unchanged
+    task_id = recent_scan_task(key, path)
+    if task_id:
+        return TaskResponse(task_id=task_id, status="completed", message="Reusing recent scan")
+    
     # Create task
     task_id = create_task("scan")
+    inflight_scans[key] = task_id
     
     # Start background scan
     background_tasks.add_task(
         scan_directory_async,
         task_id,
         str(path),
-        request.max_files
+        request.max_files,
+        key
     )
     
     return TaskResponse(
@@ -288,18 +437,27 @@ async def scan_folder(request: ScanRequest, background_tasks: BackgroundTasks):
     )
 
 @app.get("/api/scan/{task_id}/results")
-async def get_scan_results(task_id: str):
+async def get_scan_results(task_id: str, request: Request):
     """Get scan results for a completed scan task"""
-    if task_id not in tasks:
+    task = tasks.get(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    if tasks[task_id]["status"] != "completed":
+    if task["status"] != "completed":
         raise HTTPException(status_code=400, detail="Scan not completed")
     
-    if task_id not in scan_results:
+    results_file = scan_results_path(task_id)
+    if not results_file.exists():
         raise HTTPException(status_code=404, detail="Scan results not found")
     
-    return scan_results[task_id]
+    headers = {"Cache-Control": "private, max-age=60", "Vary": "Accept"}
+    if wants_msgpack(request):
+        loop = asyncio.get_running_loop()
+        scan_result = await loop.run_in_executor(IO_POOL, lambda: loads_json(results_file.read_bytes()))
+        return msgpack_response(scan_result, headers)
+    
+    # Serve the saved file as-is (sendfile where available, no re-encoding)
+    return FileResponse(results_file, media_type="application/json", headers=headers)
 
 @app.post("/api/prompt", response_model=TaskResponse)
 async def generate_prompt(request: GeneratePromptRequest, background_tasks: BackgroundTasks):
@@ -347,9 +505,9 @@ async def validate_organization_plan(request: OrganizePlanRequest):
 async def save_organization_plan(request: OrganizePlanRequest):
     """Save organization plan to disk"""
     try:
-        os.makedirs("data", exist_ok=True)
-        with open("data/plan.json", "w") as f:
-            json.dump(request.plan, f, indent=2)
+        payload = dumps_json(request.plan, indent=True)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(IO_POOL, atomic_write, "data/plan.json", payload)
         
         return {
             "success": True,
@@ -360,20 +518,26 @@ async def save_organization_plan(request: OrganizePlanRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/plan/load")
-async def load_plan():
+async def load_plan_endpoint(request: Request):
     """Load the saved organization plan"""
     try:
         plan_path = Path("data/plan.json")
         if not plan_path.exists():
             raise HTTPException(status_code=404, detail="No plan found")
         
-        with open(plan_path, 'r') as f:
-            plan = json.load(f)
+        # Version the plan by its file stats so unchanged plans are not re-read
+        stat = plan_path.stat()
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        if is_not_modified(request, etag):
+            return Response(status_code=304, headers=cache_headers(etag, last_modified=stat.st_mtime))
         
-        return {
+        body = dumps_json({
             "success": True,
-            "plan": plan
-        }
+            "plan": load_plan(plan_path)
+        })
+        return cached_json_response(request, body, etag=etag, last_modified=stat.st_mtime)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -407,12 +571,12 @@ async def organize_files(request: ExecutePlanRequest, background_tasks: Backgrou
     )
 
 @app.get("/api/task/{task_id}", response_model=TaskStatusResponse)
-async def get_task_status(task_id: str):
+async def get_task_status(task_id: str, verbose: bool = False):
     """Get status of a background task"""
-    if task_id not in tasks:
+    task = tasks.get(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task = tasks[task_id]
     # Add the task_id to the response
     return TaskStatusResponse(
         task_id=task_id,
@@ -420,25 +584,41 @@ async def get_task_status(task_id: str):
         progress=task.get("progress", 0.0),
         message=task.get("message", ""),
         result=task.get("result"),
-        error=task.get("error")
+        error=format_task_error(task_id, task) if verbose or os.getenv("DEBUG") else task.get("error")
     )
 
-@app.get("/api/tasks")
-async def list_tasks():
-    """List all tasks"""
+def task_summary(task_id: str, task: Dict[str, Any]) -> Dict[str, Any]:
+    """Summary of a task for the task list"""
     return {
-        "tasks": [
-            {
-                "task_id": task_id,
-                "type": task["type"],
-                "status": task["status"],
-                "created_at": task["created_at"],
-                "message": task["message"]
-            }
-            for task_id, task in tasks.items()
-        ]
+        "task_id": task_id,
+        "type": task["type"],
+        "status": task["status"],
+        "created_at": iso_from_ns(task["created_at_ns"]),
+        "message": task["message"]
     }
 
+def iter_task_list(items):
+    """Yield the task list as a JSON document, one task at a time"""
+    yield b'{"tasks":['
+    for i, (task_id, task) in enumerate(items):
+        if i:
+            yield b","
+        yield dumps_json(task_summary(task_id, task))
+    yield b"]}"
+
+@app.get("/api/tasks")
+async def list_tasks(request: Request):
+    """List all tasks"""
+    if wants_msgpack(request):
+        body = {"tasks": [task_summary(task_id, task) for task_id, task in tasks.items()]}
+        return msgpack_response(body, {"Vary": "Accept"})
+    
+    return StreamingResponse(
+        iter_task_list(tasks.items()),
+        media_type="application/json",
+        headers={"Vary": "Accept"}
+    )
+
 @app.post("/api/backup", response_model=TaskResponse)
 async def create_backup(request: BackupRequest):
     """Create a full backup"""
@@ -448,8 +628,9 @@ async def create_backup(request: BackupRequest):
         if not path.exists():
             raise HTTPException(status_code=400, detail="Path does not exist")
         
-        # Create backup synchronously (it's fast enough)
-        backup_file = create_full_backup(str(path), request.backup_name)
+        # Hashing every file blocks, so the backup runs in the thread pool
+        loop = asyncio.get_running_loop()
+        backup_file = await loop.run_in_executor(IO_POOL, create_full_backup, str(path), request.backup_name)
         
         return TaskResponse(
             task_id="backup_" + str(uuid.uuid4()),
@@ -460,11 +641,11 @@ async def create_backup(request: BackupRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/backups")
-async def get_backups():
+async def get_backups(request: Request):
     """List all available backups"""
     try:
         backups = list_backups()
-        return {"backups": backups}
+        return cached_json_response(request, dumps_json({"backups": backups}))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -473,7 +654,9 @@ async def revert_changes(request: RevertRequest):
     """Revert organization changes"""
     try:
         # This should be done carefully, perhaps with more confirmation
-        success = revert_organization(request.manifest_file)
+        forget_last_scan()
+        loop = asyncio.get_running_loop()
+        success = await loop.run_in_executor(IO_POOL, revert_organization, request.manifest_file)
         return {
             "success": success,
             "message": "Revert completed" if success else "Revert failed"
@@ -481,10 +664,10 @@ async def revert_changes(request: RevertRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/config")
-async def get_configuration():
-    """Get application configuration"""
-    return {
+@lru_cache(maxsize=1)
+def configuration_body() -> Tuple[bytes, str]:
+    """Serialized configuration and its ETag (Config does not change while the API runs)"""
+    body = dumps_json({
         "max_files_to_scan": Config.MAX_FILES_TO_SCAN,
         "max_files_for_prompt": Config.MAX_FILES_FOR_PROMPT,
         "file_categories": {
@@ -496,47 +679,81 @@ async def get_configuration():
             "archives": list(Config.ARCHIVE_EXTENSIONS)
         },
         "skip_folders": list(Config.SKIP_FOLDERS)
-    }
+    })
+    return body, body_etag(body)
+
+@app.get("/api/config")
+async def get_configuration(request: Request):
+    """Get application configuration"""
+    body, etag = configuration_body()
+    return cached_json_response(request, body, etag=etag, max_age=300)
+
+@lru_cache(maxsize=2)
+def openai_status_body(api_key_set: bool) -> Tuple[bytes, str]:
+    """Serialized OpenAI status and its ETag, one per key state"""
+    body = dumps_json({
+        "configured": api_key_set,
+        "model": Config.OPENAI_MODEL if api_key_set else None
+    })
+    return body, body_etag(body)
 
 @app.get("/api/openai/status")
-async def check_openai_status():
+async def check_openai_status(request: Request):
     """Check if OpenAI API is configured"""
-    return {
-        "configured": Config.OPENAI_API_KEY is not None,
-        "model": Config.OPENAI_MODEL if Config.OPENAI_API_KEY else None
-    }
+    body, etag = openai_status_body(Config.OPENAI_API_KEY is not None)
+    return cached_json_response(request, body, etag=etag, max_age=300)
 
 # Server-Sent Events for real-time updates
 @app.get("/api/events/{task_id}")
 async def task_events(task_id: str, request: Request):
-    """Stream task updates using Server-Sent Events"""
+    """Stream task updates using Server-Sent Events ("latest" follows the newest task)"""
+    if task_id == "latest":
+        task_ids = [latest_id for latest_id, _ in tasks.items()[-1:]]
+        if not task_ids:
+            raise HTTPException(status_code=404, detail="No tasks found")
+        task_id = task_ids[0]
+    
     if task_id not in tasks:
         raise HTTPException(status_code=404, detail="Task not found")
     
     async def event_generator():
         last_update = None
+        changed = asyncio.Event()
+        task_listeners.setdefault(task_id, set()).add(changed)
         
-        while True:
-            # Check if client disconnected
-            if await request.is_disconnected():
-                break
+        try:
+            while True:
+                # Check if client disconnected
+                if await request.is_disconnected():
+                    break
                 
-            # Check for updates
-            if task_id in tasks:
-                task = tasks[task_id]
-                current_update = task["updated_at"]
+                # Clear before reading so an update made meanwhile wakes us again
+                changed.clear()
+                task = tasks.get(task_id)
+                if task is None:
+                    break
                 
                 # Send update if changed
+                current_update = task["updated_at_ns"]
                 if current_update != last_update:
                     last_update = current_update
-                    yield f"data: {json.dumps(task)}\n\n"
+                    yield f"data: {json.dumps(task_payload(task))}\n\n"
                 
                 # Exit if task is complete
                 if task["status"] in ["completed", "failed"]:
                     break
-            
-            # Wait a bit before next check
-            await asyncio.sleep(0.1)
+                
+                # Sleep until the task changes, with a keep-alive comment when idle
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+        finally:
+            listeners = task_listeners.get(task_id)
+            if listeners is not None:
+                listeners.discard(changed)
+                if not listeners:
+                    del task_listeners[task_id]
     
     return StreamingResponse(
         event_generator(),
@@ -544,6 +761,7 @@ async def task_events(task_id: str, request: Request):
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
+            "X-Task-ID": task_id,
         }
     )
 
@@ -551,7 +769,6 @@ async def task_events(task_id: str, request: Request):
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle unexpected errors"""
-    import traceback
     return JSONResponse(
         status_code=500,
         content={
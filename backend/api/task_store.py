@@ -0,0 +1,90 @@
+"""
+Task storage for the API
+Keeps background task state bounded in memory
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.config.settings import Config
+
+FINISHED_STATUSES = {"completed", "failed"}
+
+
+class InMemoryTaskStore:
+    """Bounded in-process task store that evicts finished tasks after a TTL"""
+
+    def __init__(self, maxsize=512, ttl=3600, on_evict: Optional[Callable[[str], None]] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._tasks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._expires: Dict[str, float] = {}
+
+    def __contains__(self, task_id: str) -> bool:
+        self._expire()
+        return task_id in self._tasks
+
+    def __len__(self) -> int:
+        self._expire()
+        return len(self._tasks)
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get a task by ID, or None if unknown or expired"""
+        self._expire()
+        return self._tasks.get(task_id)
+
+    def set(self, task_id: str, task: Dict[str, Any]):
+        """Store a task, evicting old tasks if the store is full"""
+        self._tasks[task_id] = task
+        self._tasks.move_to_end(task_id)
+        self._track_expiry(task_id, task)
+        self._expire()
+
+    def update(self, task_id: str, **fields) -> Optional[Dict[str, Any]]:
+        """Update fields of an existing task"""
+        task = self._tasks.get(task_id)
+        if task is None:
+            return None
+        task.update(fields)
+        self._track_expiry(task_id, task)
+        return task
+
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """List (task_id, task) pairs, oldest first"""
+        self._expire()
+        return list(self._tasks.items())
+
+    def _track_expiry(self, task_id: str, task: Dict[str, Any]):
+        # Only finished tasks expire; running tasks are kept until done
+        if task.get("status") in FINISHED_STATUSES:
+            self._expires.setdefault(task_id, time.monotonic() + self.ttl)
+        else:
+            self._expires.pop(task_id, None)
+
+    def _expire(self):
+        now = time.monotonic()
+        for task_id, expires_at in list(self._expires.items()):
+            if expires_at <= now:
+                self._evict(task_id)
+
+        while len(self._tasks) > self.maxsize:
+            # Prefer dropping the oldest finished task over a running one
+            victim = next(iter(self._expires), None) or next(iter(self._tasks))
+            self._evict(victim)
+
+    def _evict(self, task_id: str):
+        self._tasks.pop(task_id, None)
+        self._expires.pop(task_id, None)
+        if self.on_evict:
+            self.on_evict(task_id)
+
+
+def create_task_store(on_evict: Optional[Callable[[str], None]] = None):
+    """Create the task store configured for this process"""
+    return InMemoryTaskStore(
+        maxsize=Config.TASK_STORE_MAXSIZE,
+        ttl=Config.TASK_TTL_SECONDS,
+        on_evict=on_evict,
+    )
@@ -2,6 +2,6 @@
 Configuration module
 """
 
-from .settings import Config, config
+from .settings import Config, config, should_skip_folder
 
-__all__ = ["Config", "config"]
+__all__ = ["Config", "config", "should_skip_folder"]
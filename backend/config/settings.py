@@ -3,6 +3,7 @@ Configuration settings for the File Organizer
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
 
 class Config:
@@ -11,6 +12,8 @@ class Config:
     # API Settings
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = "gpt-4-turbo-preview"
+    OPENAI_TIMEOUT_SECONDS = 120  # Per request, the plan can take a while to generate
+    OPENAI_MAX_RETRIES = 4  # Retries for transient errors, with exponential backoff
     
     # Scanning Settings
     MAX_FILES_TO_SCAN = 1000  # Maximum files to scan
@@ -18,45 +21,49 @@ class Config:
     MAX_CONTENT_SNIPPET_LENGTH = 200  # Characters
     MAX_FILE_SIZE_FOR_CONTENT = 100 * 1024 * 1024  # 100MB
     
+    # Prompt Settings (both rewrite the snippets the model sees, so both are opt-in)
+    COMPRESS_PROMPT_SNIPPETS = os.getenv("FILEORG_COMPRESS_PROMPT") == "1"  # Drop filler words from snippets
+    GROUP_PROMPT_SNIPPETS = os.getenv("FILEORG_GROUP_SNIPPETS") == "1"  # List near-duplicate snippets once
+    
     # Organization Settings
     PRESERVE_FOLDER_THRESHOLD = 0.8  # 80% similarity to consider organized
     MIN_FILES_FOR_ORGANIZED_FOLDER = 3
     
     # File Type Categories
-    DOCUMENT_EXTENSIONS = {
+    DOCUMENT_EXTENSIONS = frozenset({
         '.pdf', '.doc', '.docx', '.txt', '.odt', '.rtf', 
         '.tex', '.wpd', '.md'
-    }
+    })
     
-    CODE_EXTENSIONS = {
+    CODE_EXTENSIONS = frozenset({
         '.py', '.js', '.java', '.cpp', '.c', '.h', '.cs', 
         '.php', '.rb', '.go', '.rs', '.swift', '.kt', '.scala',
         '.r', '.m', '.sh', '.bat', '.ps1', '.sql', '.html',
         '.css', '.jsx', '.tsx', '.vue', '.json', '.xml', '.yaml'
-    }
+    })
     
-    IMAGE_EXTENSIONS = {
+    IMAGE_EXTENSIONS = frozenset({
         '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg', 
         '.ico', '.tiff', '.webp', '.heic', '.raw'
-    }
+    })
     
-    VIDEO_EXTENSIONS = {
+    VIDEO_EXTENSIONS = frozenset({
         '.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', 
         '.webm', '.m4v', '.mpg', '.mpeg', '.3gp'
-    }
+    })
     
-    AUDIO_EXTENSIONS = {
+    AUDIO_EXTENSIONS = frozenset({
         '.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', 
         '.m4a', '.opus', '.ape'
-    }
+    })
     
-    ARCHIVE_EXTENSIONS = {
+    ARCHIVE_EXTENSIONS = frozenset({
         '.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', 
         '.xz', '.iso', '.dmg'
-    }
+    })
     
     # Folders to skip
-    SKIP_FOLDERS = {
+    SKIP_FOLDERS = frozenset({
         '.git', '.svn', '.hg', '.bzr',
         'node_modules', '__pycache__', '.vscode', '.idea',
         'venv', 'env', '.env', 'virtualenv',
@@ -64,10 +71,10 @@ class Config:
         '.pytest_cache', '.mypy_cache', '.tox',
         'coverage', '.coverage', 'htmlcov',
         '.DS_Store', 'Thumbs.db', 'desktop.ini'
-    }
+    })
     
     # Project indicators (files that indicate a project root)
-    PROJECT_INDICATORS = {
+    PROJECT_INDICATORS = frozenset({
         # Build files
         'package.json', 'package-lock.json', 'yarn.lock',
         'requirements.txt', 'Pipfile', 'poetry.lock', 'setup.py',
@@ -81,8 +88,30 @@ class Config:
         
         # IDE files
         '.project', '.classpath', '*.sln', '*.xcodeproj'
+    })
+    
+    # Every extension that belongs to a known category
+    ALL_KNOWN_EXTENSIONS = (
+        DOCUMENT_EXTENSIONS | CODE_EXTENSIONS | IMAGE_EXTENSIONS |
+        VIDEO_EXTENSIONS | AUDIO_EXTENSIONS | ARCHIVE_EXTENSIONS
+    )
+    
+    # Extension -> category lookup, built once (later entries win, so the
+    # order mirrors the precedence of the category checks in reverse)
+    _CATEGORY_LOOKUP = {
+        **dict.fromkeys(ARCHIVE_EXTENSIONS, "Archives"),
+        **dict.fromkeys(AUDIO_EXTENSIONS, "Audio"),
+        **dict.fromkeys(VIDEO_EXTENSIONS, "Videos"),
+        **dict.fromkeys(IMAGE_EXTENSIONS, "Images"),
+        **dict.fromkeys(CODE_EXTENSIONS, "Code"),
+        **dict.fromkeys(DOCUMENT_EXTENSIONS, "Documents"),
     }
     
+    # Wildcard project indicators ('*.sln') as plain suffixes ('.sln')
+    _PROJECT_SUFFIXES = tuple(
+        indicator.lstrip('*') for indicator in PROJECT_INDICATORS if indicator.startswith('*')
+    )
+    
     # Organization Categories
     DEFAULT_CATEGORIES = {
         "Work": {
@@ -108,9 +137,17 @@ class Config:
     }
     
     # Backup Settings
-    BACKUP_HASH_SIZE_LIMIT = 10 * 1024 * 1024  # Only hash files < 10MB
+    BACKUP_HASH_SIZE_LIMIT = 10 * 1024 * 1024  # Larger files get a sampled hash
+    HASH_ALGO = os.getenv("FILEORG_HASH_ALGO", "blake3")  # blake3 (if installed), blake2b or sha256
+    HASH_SAMPLE_SIZE = 64 * 1024  # Bytes read from the head, middle and tail of large files
     ARCHIVE_BACKUPS_AFTER_DAYS = 30
     
+    # API Task Store Settings
+    TASK_STORE_MAXSIZE = 512  # Maximum tasks kept in memory
+    TASK_TTL_SECONDS = 3600  # Keep finished tasks for 1 hour
+    API_IO_THREADS = int(os.getenv("FILEORG_IO_THREADS", "64"))  # Threads for blocking file I/O
+    SCAN_REUSE_SECONDS = 30  # Serve a repeat scan of an unchanged folder from the last result
+    
     # UI Settings
     PROGRESS_BAR_ENABLED = True
     COLORED_OUTPUT = True
@@ -122,29 +159,12 @@ class Config:
     @classmethod
     def get_file_category(cls, extension):
         """Get the category for a file extension"""
-        ext = extension.lower()
-        
-        if ext in cls.DOCUMENT_EXTENSIONS:
-            return "Documents"
-        elif ext in cls.CODE_EXTENSIONS:
-            return "Code"
-        elif ext in cls.IMAGE_EXTENSIONS:
-            return "Images"
-        elif ext in cls.VIDEO_EXTENSIONS:
-            return "Videos"
-        elif ext in cls.AUDIO_EXTENSIONS:
-            return "Audio"
-        elif ext in cls.ARCHIVE_EXTENSIONS:
-            return "Archives"
-        else:
-            return "Other"
+        return cls._CATEGORY_LOOKUP.get(extension.lower(), "Other")
     
     @classmethod
     def is_project_file(cls, filename):
         """Check if a file indicates a project root"""
-        return filename in cls.PROJECT_INDICATORS or \
-               any(filename.endswith(indicator) for indicator in cls.PROJECT_INDICATORS 
-                   if '*' in indicator)
+        return filename in cls.PROJECT_INDICATORS or filename.endswith(cls._PROJECT_SUFFIXES)
     
     @classmethod
     def should_skip_folder(cls, folder_name):
@@ -164,6 +184,12 @@ class Config:
     @classmethod
     def get_all_settings(cls):
         """Get all configuration settings as a dictionary"""
+        return dict(cls._collect_settings())
+    
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _collect_settings(cls):
+        """Scan the class for settings once (Config is not changed at runtime)"""
         settings = {}
         for attr in dir(cls):
             if not attr.startswith('_') and attr.isupper():
@@ -171,4 +197,7 @@ class Config:
         return settings
 
 # Create a singleton instance
-config = Config()
\ No newline at end of file
+config = Config()
+
+# Direct membership test for hot loops (skips the classmethod call)
+should_skip_folder = Config.SKIP_FOLDERS.__contains__
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""
+Bulk folder listing for macOS
+getattrlistbulk(2) returns the name, type, times and size of many entries per
+call, so scanning a folder needs no readdir + lstat per file
+"""
+
+import ctypes
+import os
+import stat as stat_module
+import struct
+
+libc = ctypes.CDLL(None, use_errno=True)
+_getattrlistbulk = libc.getattrlistbulk  # AttributeError before macOS 10.10
+_getattrlistbulk.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p,
+                             ctypes.c_size_t, ctypes.c_uint64]
+_getattrlistbulk.restype = ctypes.c_int
+
+# sys/attr.h
+ATTR_BIT_MAP_COUNT = 5
+ATTR_CMN_NAME = 0x00000001
+ATTR_CMN_OBJTYPE = 0x00000008
+ATTR_CMN_MODTIME = 0x00000400
+ATTR_CMN_CHGTIME = 0x00000800
+ATTR_CMN_ACCTIME = 0x00001000
+ATTR_CMN_ERROR = 0x20000000
+ATTR_CMN_RETURNED_ATTRS = 0x80000000
+ATTR_FILE_DATALENGTH = 0x00000200
+
+# sys/vnode.h object types
+VREG, VDIR, VLNK = 1, 2, 5
+
+BUFFER_SIZE = 256 * 1024
+
+class _AttrList(ctypes.Structure):
+    _fields_ = [
+        ("bitmapcount", ctypes.c_ushort),
+        ("reserved", ctypes.c_uint16),
+        ("commonattr", ctypes.c_uint32),
+        ("volattr", ctypes.c_uint32),
+        ("dirattr", ctypes.c_uint32),
+        ("fileattr", ctypes.c_uint32),
+        ("forkattr", ctypes.c_uint32),
+    ]
+
+_ATTRS = _AttrList(
+    bitmapcount=ATTR_BIT_MAP_COUNT,
+    commonattr=(ATTR_CMN_RETURNED_ATTRS | ATTR_CMN_NAME | ATTR_CMN_ERROR | ATTR_CMN_OBJTYPE |
+                ATTR_CMN_MODTIME | ATTR_CMN_CHGTIME | ATTR_CMN_ACCTIME),
+    fileattr=ATTR_FILE_DATALENGTH,
+)
+
+# Packed entry fields (attributes are only 4-byte aligned, so no padding)
+_U32 = struct.Struct("=I")
+_RETURNED = struct.Struct("=5I")
+_NAME_REF = struct.Struct("=iI")
+_TIMESPEC = struct.Struct("=qq")
+_OFF_T = struct.Struct("=q")
+
+_TIME_ATTRS = (ATTR_CMN_MODTIME, ATTR_CMN_CHGTIME, ATTR_CMN_ACCTIME)
+_MODES = {VREG: stat_module.S_IFREG, VDIR: stat_module.S_IFDIR, VLNK: stat_module.S_IFLNK}
+
+
+class BulkEntry:
+    """Directory entry with the same is_dir/is_symlink/stat calls as os.DirEntry"""
+    __slots__ = ("name", "path", "_objtype", "_stat")
+
+    def __init__(self, directory, name, objtype, stat):
+        self.name = name
+        self.path = os.path.join(directory, name)
+        self._objtype = objtype
+        self._stat = stat
+
+    def is_dir(self):
+        if self._objtype == VLNK:
+            return os.path.isdir(self.path)
+        return self._objtype == VDIR
+
+    def is_symlink(self):
+        return self._objtype == VLNK
+
+    def stat(self):
+        if self._stat is None:
+            # Symlinks (and entries whose attributes failed) follow the link like DirEntry.stat
+            self._stat = os.stat(self.path)
+        return self._stat
+
+
+def _parse_entries(directory, buf, count):
+    """Decode count packed entries from a getattrlistbulk buffer"""
+    entries = []
+    pos = 0
+    for _ in range(count):
+        (length,) = _U32.unpack_from(buf, pos)
+        field = pos + 4
+        common, _vol, _dir, fileattr, _fork = _RETURNED.unpack_from(buf, field)
+        field += _RETURNED.size
+
+        error = 0
+        if common & ATTR_CMN_ERROR:
+            (error,) = _U32.unpack_from(buf, field)
+            field += 4
+
+        name = None
+        if common & ATTR_CMN_NAME:
+            offset, name_length = _NAME_REF.unpack_from(buf, field)
+            start = field + offset
+            name = os.fsdecode(buf[start:start + name_length - 1])  # Drop the trailing NUL
+            field += _NAME_REF.size
+
+        objtype = None
+        if common & ATTR_CMN_OBJTYPE:
+            (objtype,) = _U32.unpack_from(buf, field)
+            field += 4
+
+        times = {}  # attr -> (seconds, nanoseconds)
+        for attr in _TIME_ATTRS:
+            if common & attr:
+                times[attr] = _TIMESPEC.unpack_from(buf, field)
+                field += _TIMESPEC.size
+
+        size = 0
+        if fileattr & ATTR_FILE_DATALENGTH:
+            (size,) = _OFF_T.unpack_from(buf, field)
+
+        pos += length
+        if name is None:
+            continue
+
+        stat = None
+        if not error and objtype in (VREG, VDIR) and len(times) == len(_TIME_ATTRS):
+            atime, mtime, ctime = (times[attr] for attr in (ATTR_CMN_ACCTIME, ATTR_CMN_MODTIME, ATTR_CMN_CHGTIME))
+            stat = os.stat_result(
+                (_MODES[objtype], 0, 0, 0, 0, 0, size,
+                 atime[0] + atime[1] / 1e9, mtime[0] + mtime[1] / 1e9, ctime[0] + ctime[1] / 1e9),
+                {
+                    "st_atime_ns": atime[0] * 1_000_000_000 + atime[1],
+                    "st_mtime_ns": mtime[0] * 1_000_000_000 + mtime[1],
+                    "st_ctime_ns": ctime[0] * 1_000_000_000 + ctime[1],
+                },
+            )
+        entries.append(BulkEntry(directory, name, objtype, stat))
+    return entries
+
+
+def list_dir(directory):
+    """List a folder's entries with getattrlistbulk, raising OSError like os.scandir"""
+    directory = os.fspath(directory)
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        buf = ctypes.create_string_buffer(BUFFER_SIZE)
+        entries = []
+        while True:
+            count = _getattrlistbulk(fd, ctypes.byref(_ATTRS), buf, BUFFER_SIZE, 0)
+            if count < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, os.strerror(err), directory)
+            if count == 0:
+                return entries
+            entries.extend(_parse_entries(directory, buf.raw, count))
+    finally:
+        os.close(fd)
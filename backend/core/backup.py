@@ -1,21 +1,142 @@
+import copy
 import os
 import shutil
-import json
+import stat as stat_module
 from pathlib import Path
 from datetime import datetime
-from tqdm import tqdm
 import hashlib
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from itertools import chain, islice
+from backend.config.settings import Config
+from backend.utils.cli import throttled_progress
+from backend.utils.fileio import atomic_open, atomic_write, dumps_json, is_empty_dir, loads_json, move_path
 
-BACKUP_FILE = "data/backup_manifest.json"
+try:
+    import blake3
+except ImportError:  # Optional: fall back to hashlib's blake2b
+    blake3 = None
+
+BACKUP_FILE = "data/backup_manifest.jsonl"  # Header line, then one JSON line per recorded file
+LEGACY_BACKUP_FILE = "data/backup_manifest.json"  # Single JSON document, written by older versions
 ARCHIVE_DIR = "data/backup_archives"
+MANIFEST_SUFFIXES = (".jsonl", ".json")
+MMAP_HASH_LIMIT = 256 * 1024 * 1024  # Larger files are hashed in buffered chunks to bound memory
+SMALL_HASH_READ = 64 * 1024  # Files up to this size are read in one call (cheaper than mapping)
+HASH_WORKERS = min(8, os.cpu_count() or 1)  # Threads hashing files for full backups and reverts
+REVERT_BATCH_SIZE = 256  # Manifest entries verified together while reverting
+
+def file_version(path, stat=None):
+    """(inode, mtime_ns, size) of a file, used to key caches of parsed files"""
+    # The inode catches atomic rewrites that keep the size within one mtime tick
+    stat = stat or os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+def read_json(path):
+    """Parse a JSON file"""
+    return loads_json(Path(path).read_bytes())
+
+@lru_cache(maxsize=256)
+def _backup_summary_cached(path_str, version, kind):
+    if kind == "Full Backup":
+        # Full backups can be large, so only their summary is kept
+        data = read_json(path_str)
+        return data["timestamp"], data["statistics"]["total_files"]
+    header = read_manifest_header(path_str)
+    return header["timestamp"], header["entries"]
+
+def _parse_header_line(line):
+    """Parse the header line of a JSON-lines manifest, or None for a legacy manifest"""
+    try:
+        header = loads_json(line)
+    except ValueError:
+        return None
+    if not isinstance(header, dict) or "original_state" in header:
+        return None
+    return header
+
+def current_manifest():
+    """Path of the latest organization manifest (a legacy .json one if no .jsonl exists)"""
+    if os.path.exists(BACKUP_FILE):
+        return BACKUP_FILE
+    return LEGACY_BACKUP_FILE
+
+def read_manifest_header(manifest_file=BACKUP_FILE):
+    """Read a manifest's timestamp, root path, plan summary and entry count"""
+    with open(manifest_file, 'rb') as f:
+        header = _parse_header_line(f.readline())
+    
+    if header is None:
+        # Legacy manifest: one JSON document holding every entry
+        manifest = read_json(manifest_file)
+        header = {k: v for k, v in manifest.items() if k != "original_state"}
+        header["entries"] = len(manifest.get("original_state", []))
+    return header
+
+def iter_manifest_entries(manifest_file=BACKUP_FILE):
+    """Yield a manifest's recorded files one at a time"""
+    with open(manifest_file, 'rb') as f:
+        if _parse_header_line(f.readline()) is None:
+            yield from read_json(manifest_file).get("original_state", [])
+            return
+        
+        for line in f:
+            if line.strip():
+                yield loads_json(line)
 
-def load_backup_manifest(manifest_file=BACKUP_FILE):
-    """Load the backup manifest"""
+def load_backup_manifest(manifest_file=None):
+    """Load the backup manifest (parsed again only when the file changes)"""
+    manifest_file = manifest_file or current_manifest()
     if not Path(manifest_file).exists():
         raise FileNotFoundError(f"Backup manifest not found: {manifest_file}")
         
-    with open(manifest_file, 'r') as f:
-        return json.load(f)
+    # Callers get their own copy, so changing it cannot alter the cached manifest
+    return copy.deepcopy(_load_manifest_cached(str(manifest_file), file_version(manifest_file)))
+
+@lru_cache(maxsize=8)
+def _load_manifest_cached(path_str, version):
+    manifest = read_manifest_header(path_str)
+    del manifest["entries"]
+    manifest["original_state"] = list(iter_manifest_entries(path_str))
+    return manifest
+
+def write_backup_manifest(manifest, manifest_file=BACKUP_FILE):
+    """Save a manifest as JSON lines: a header, then one line per recorded file"""
+    header = {k: v for k, v in manifest.items() if k != "original_state"}
+    header["entries"] = len(manifest["original_state"])
+    
+    with atomic_open(manifest_file) as f:
+        f.write(dumps_json(header) + b"\n")
+        for entry in manifest["original_state"]:
+            f.write(dumps_json(entry) + b"\n")
+    
+    # A legacy manifest is superseded by the new one, so archive it (it used to be overwritten)
+    if manifest_file == BACKUP_FILE and os.path.exists(LEGACY_BACKUP_FILE):
+        archive_manifest(LEGACY_BACKUP_FILE)
+
+def backup_summary(path, kind, stat=None):
+    """(timestamp, file count) of a manifest or full backup, cached until it changes"""
+    version = file_version(path, stat)
+    timestamp, files = _backup_summary_cached(str(path), version, kind)
+    return {"type": kind, "file": str(path), "timestamp": timestamp, "files": files}
+
+def previous_file_hashes(root):
+    """Hashes from the newest manifest of root, keyed by (original_path, size, mtime_ns)"""
+    archives = sorted((entry.path for entry in scan_json_files(ARCHIVE_DIR, suffixes=MANIFEST_SUFFIXES)),
+                      reverse=True)
+    for manifest_file in [current_manifest(), *archives]:
+        try:
+            if Path(read_manifest_header(manifest_file)["root_path"]).resolve() != root:
+                continue
+            return {
+                (entry["original_path"], entry["size"], entry["mtime_ns"]): entry["file_hash"]
+                for entry in iter_manifest_entries(manifest_file)
+                if entry.get("file_hash") and "mtime_ns" in entry
+            }
+        except Exception:
+            continue
+    return {}
 
 def create_backup_manifest(root_path, plan):
     """Create a backup manifest before moving files"""
@@ -31,59 +152,157 @@ def create_backup_manifest(root_path, plan):
     
     root = Path(root_path).resolve()
     
-    # Record current state of files to be moved
+    # Record current state of files to be moved (one stat per source)
+    found = []
     for move in plan.get("moves", []):
         if "relative_path" in move:
             source = root / move["relative_path"]
         else:
             source = root / move["file"]
-            
-        if source.exists():
-            # Calculate file hash for verification
-            file_hash = calculate_file_hash(source) if source.is_file() else None
-            
+        
+        try:
+            found.append((source, str(source.relative_to(root)), move, source.stat()))
+        except OSError:
+            pass
+    
+    # Files unchanged since the last manifest of this folder keep their hash
+    known_hashes = previous_file_hashes(root)
+    algo_label = hash_label(Config.HASH_ALGO)
+    
+    def hash_source(item):
+        source, rel_path, _, stat = item
+        if not stat_module.S_ISREG(stat.st_mode):
+            return None
+        label = algo_label + ("-sample" if stat.st_size > Config.BACKUP_HASH_SIZE_LIMIT else "")
+        known = known_hashes.get((rel_path, stat.st_size, stat.st_mtime_ns))
+        if known and known.startswith(label + ":"):
+            return known
+        return calculate_file_hash(source)
+    
+    # Calculate file hashes for verification in parallel
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+        hashes = executor.map(hash_source, found)
+        
+        for (source, rel_path, move, stat), file_hash in zip(found, hashes):
             manifest["original_state"].append({
-                "original_path": str(source.relative_to(root)),
+                "original_path": rel_path,
                 "new_path": move["new_path"],
                 "file_hash": file_hash,
-                "size": source.stat().st_size if source.exists() else 0,
-                "modified": source.stat().st_mtime if source.exists() else 0
+                "size": stat.st_size,
+                "modified": stat.st_mtime,
+                "mtime_ns": stat.st_mtime_ns
             })
     
     # Save manifest
-    os.makedirs("data", exist_ok=True)
-    with open(BACKUP_FILE, 'w') as f:
-        json.dump(manifest, f, indent=2)
+    write_backup_manifest(manifest)
         
     return manifest
 
-def verify_file_integrity(filepath, expected_hash):
+def verify_file_integrity(filepath, expected_hash, expected_size=None):
     """Verify file hasn't been modified using hash"""
-    if not filepath.exists() or not expected_hash:
+    if not expected_hash:
         return False
-        
-    actual_hash = calculate_file_hash(filepath)
-    return actual_hash == expected_hash
+    try:
+        size = os.stat(filepath).st_size
+    except OSError:
+        return False
+    
+    # A changed size already proves the file was modified, without reading it
+    if expected_size is not None and size != expected_size:
+        return False
+    
+    # Hashes are stored as "algo:digest" or "algo-sample:digest";
+    # manifests from before that carry a bare SHA256 of the whole file
+    label, _, digest = expected_hash.rpartition(":")
+    algo, _, sampled = (label or "sha256").partition("-")
+    actual_hash = calculate_file_hash(filepath, algo=algo, sample=bool(sampled))
+    return actual_hash is not None and actual_hash.rpartition(":")[2] == digest
+
+def new_hasher(algo):
+    """Create a hash object for the configured algorithm"""
+    if algo == "blake3" and blake3 is not None:
+        return blake3.blake3()
+    if algo in ("blake3", "blake2b"):
+        return hashlib.blake2b()
+    return hashlib.sha256()
 
-def calculate_file_hash(filepath, chunk_size=8192):
-    """Calculate SHA256 hash of a file"""
-    sha256_hash = hashlib.sha256()
+def hash_label(algo):
+    """Name of the algorithm actually used for a configured one"""
+    if algo == "blake3" and blake3 is None:
+        return "blake2b"
+    return algo if algo in ("blake3", "blake2b") else "sha256"
+
+def update_from_file(hasher, f, size, chunk_size=1024 * 1024):
+    """Feed a whole file to a hasher, as one memory-mapped buffer when possible"""
+    if size <= SMALL_HASH_READ:
+        hasher.update(f.read(size) if size else f.read())
+        return
+    
+    if size <= MMAP_HASH_LIMIT:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                hasher.update(mm)
+            return
+        except (OSError, ValueError):
+            f.seek(0)  # Not mappable (e.g. special files): read it instead
+    
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)  # Ask for more read-ahead
+        except OSError:
+            pass
+    
+    # Read into one reused buffer instead of allocating a bytes object per chunk
+    buffer = memoryview(bytearray(chunk_size))
+    while True:
+        n = f.readinto(buffer)
+        if not n:
+            break
+        hasher.update(buffer[:n])
+
+def calculate_file_hash(filepath, chunk_size=1024 * 1024, algo=None, sample=None):
+    """Calculate a file hash, sampling head/middle/tail of files over the size limit"""
+    algo = algo or Config.HASH_ALGO
+    hasher = new_hasher(algo)
     try:
-        with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(chunk_size), b""):
-                sha256_hash.update(chunk)
-        return sha256_hash.hexdigest()
+        with open(filepath, "rb", buffering=0) as f:
+            size = os.fstat(f.fileno()).st_size
+            if sample is None:
+                sample = size > Config.BACKUP_HASH_SIZE_LIMIT
+            
+            if sample:
+                block = Config.HASH_SAMPLE_SIZE
+                for offset in (0, max(0, size // 2 - block // 2), max(0, size - block)):
+                    f.seek(offset)
+                    hasher.update(f.read(block))
+                hasher.update(size.to_bytes(8, "little"))
+            else:
+                update_from_file(hasher, f, size, chunk_size)
+        
+        label = hash_label(algo) + ("-sample" if sample else "")
+        return f"{label}:{hasher.hexdigest()}"
     except:
         return None
 
-def revert_organization(manifest_file=BACKUP_FILE, verify_integrity=True):
+def entry_is_intact(root_path, entry):
+    """Whether a manifest entry's file still matches its stored hash (None if it has none)"""
+    if not entry.get("file_hash"):
+        return None
+    return verify_file_integrity(root_path / entry["new_path"], entry["file_hash"], entry.get("size"))
+
+def revert_organization(manifest_file=None, verify_integrity=True):
     """Revert file organization using backup manifest"""
-    manifest = load_backup_manifest(manifest_file)
+    manifest_file = manifest_file or current_manifest()
+    if not Path(manifest_file).exists():
+        raise FileNotFoundError(f"Backup manifest not found: {manifest_file}")
+    
+    # Only the header is read up front; entries are streamed while reverting
+    manifest = read_manifest_header(manifest_file)
     root_path = Path(manifest["root_path"]).resolve()
     
     print(f"🔄 Reverting organization from: {manifest['timestamp']}")
     print(f"📁 Root path: {root_path}")
-    print(f"📊 Files to revert: {len(manifest['original_state'])}\n")
+    print(f"📊 Files to revert: {manifest['entries']}\n")
     
     # Confirmation
     response = input("⚠️  This will move files back to their original locations. Continue? (yes/no): ")
@@ -97,51 +316,64 @@ def revert_organization(manifest_file=BACKUP_FILE, verify_integrity=True):
     
     print("\n🔄 Reverting files...\n")
     
-    for entry in tqdm(manifest["original_state"], desc="Reverting files"):
-        try:
-            current_path = root_path / entry["new_path"]
-            original_path = root_path / entry["original_path"]
-            
-            if not current_path.exists():
-                # Try to find file in original location (maybe already reverted)
-                if original_path.exists():
-                    successful_reverts += 1
-                    continue
-                else:
-                    failed_reverts.append({
-                        "file": entry["new_path"],
-                        "error": "File not found in current location"
-                    })
-                    continue
-            
-            # Verify file integrity if requested
-            if verify_integrity and entry.get("file_hash"):
-                if not verify_file_integrity(current_path, entry["file_hash"]):
+    # Folders already created (or known to exist) during this revert
+    ready_dirs = set()
+    
+    # Each batch of files is hashed in parallel while its moves run in order,
+    # so the loop mostly waits on renames rather than on reading file contents
+    entries = iter_manifest_entries(manifest_file)
+    check = partial(entry_is_intact, root_path) if verify_integrity else lambda entry: None
+    
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+        batches = iter(lambda: list(islice(entries, REVERT_BATCH_SIZE)), [])
+        checked = chain.from_iterable(zip(batch, executor.map(check, batch)) for batch in batches)
+        
+        for entry, intact in throttled_progress(checked, manifest["entries"], "Reverting files"):
+            try:
+                current_path = root_path / entry["new_path"]
+                original_path = root_path / entry["original_path"]
+                
+                if not current_path.exists():
+                    # Try to find file in original location (maybe already reverted)
+                    if original_path.exists():
+                        successful_reverts += 1
+                        continue
+                    else:
+                        failed_reverts.append({
+                            "file": entry["new_path"],
+                            "error": "File not found in current location"
+                        })
+                        continue
+                
+                # Integrity (if requested) was checked by the pool before the move
+                if intact is False:
                     integrity_warnings.append({
                         "file": str(current_path),
                         "warning": "File has been modified since organization"
                     })
-            
-            # Create original directory if needed
-            os.makedirs(original_path.parent, exist_ok=True)
-            
-            # Handle conflicts
-            if original_path.exists():
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                backup_name = f"{original_path.stem}_conflict_{timestamp}{original_path.suffix}"
-                backup_path = original_path.parent / backup_name
-                shutil.move(str(original_path), str(backup_path))
-                print(f"\n⚠️ Conflict resolved: Existing file backed up to {backup_name}")
-            
-            # Move file back
-            shutil.move(str(current_path), str(original_path))
-            successful_reverts += 1
-            
-        except Exception as e:
-            failed_reverts.append({
-                "file": entry.get("new_path", "unknown"),
-                "error": str(e)
-            })
+                
+                # Create original directory if needed (once per folder)
+                if original_path.parent not in ready_dirs:
+                    os.makedirs(original_path.parent, exist_ok=True)
+                    ready_dirs.add(original_path.parent)
+                
+                # Handle conflicts
+                if original_path.exists():
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    backup_name = f"{original_path.stem}_conflict_{timestamp}{original_path.suffix}"
+                    backup_path = original_path.parent / backup_name
+                    shutil.move(str(original_path), str(backup_path))
+                    print(f"\n⚠️ Conflict resolved: Existing file backed up to {backup_name}")
+                
+                # Move file back
+                move_path(current_path, original_path)
+                successful_reverts += 1
+                
+            except Exception as e:
+                failed_reverts.append({
+                    "file": entry.get("new_path", "unknown"),
+                    "error": str(e)
+                })
     
     # Clean up empty folders created during organization
     print("\n🧹 Cleaning up empty folders...")
@@ -179,12 +411,10 @@ def cleanup_empty_folders(root_path, created_folders):
     removed_count = 0
     
     # Sort folders by depth (deepest first)
-    folder_paths = [root / folder for folder in created_folders]
-    folder_paths.sort(key=lambda p: len(p.parts), reverse=True)
-    
-    for folder_path in folder_paths:
+    for folder in sorted(created_folders, key=lambda folder: folder.count('/'), reverse=True):
+        folder_path = root / folder
         try:
-            if folder_path.exists() and not any(folder_path.iterdir()):
+            if is_empty_dir(folder_path):
                 folder_path.rmdir()
                 removed_count += 1
         except:
@@ -197,7 +427,7 @@ def archive_manifest(manifest_file):
     os.makedirs(ARCHIVE_DIR, exist_ok=True)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    archive_name = f"backup_manifest_{timestamp}.json"
+    archive_name = f"backup_manifest_{timestamp}{Path(manifest_file).suffix}"  # Keeps .json for legacy ones
     archive_path = Path(ARCHIVE_DIR) / archive_name
     
     shutil.move(manifest_file, str(archive_path))
@@ -225,36 +455,37 @@ def create_full_backup(root_path, backup_name=None):
     print(f"📸 Creating full backup of directory structure...")
     
     # Scan all files
-    for filepath in tqdm(list(root.rglob("*")), desc="Scanning files"):
+    found = []
+    for filepath in root.rglob("*"):
         if filepath.is_file():
             try:
-                stat = filepath.stat()
-                rel_path = str(filepath.relative_to(root))
-                
-                backup["files"].append({
-                    "path": rel_path,
-                    "size": stat.st_size,
-                    "modified": stat.st_mtime,
-                    "hash": calculate_file_hash(filepath) if stat.st_size < 10*1024*1024 else None
-                })
-                
-                # Update statistics
-                backup["statistics"]["total_files"] += 1
-                backup["statistics"]["total_size_mb"] += stat.st_size / (1024 * 1024)
-                
-                ext = filepath.suffix.lower()
-                backup["statistics"]["by_extension"][ext] = \
-                    backup["statistics"]["by_extension"].get(ext, 0) + 1
-                    
+                found.append((filepath, filepath.stat()))
             except Exception as e:
                 print(f"\n⚠️ Error backing up {filepath}: {e}")
     
+    # Hash in parallel (hashlib releases the GIL while hashing large buffers)
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+        hashes = executor.map(calculate_file_hash, [filepath for filepath, _ in found])
+        
+        for (filepath, stat), file_hash in throttled_progress(zip(found, hashes), len(found), "Hashing files"):
+            backup["files"].append({
+                "path": str(filepath.relative_to(root)),
+                "size": stat.st_size,
+                "modified": stat.st_mtime,
+                "hash": file_hash
+            })
+            
+            # Update statistics
+            backup["statistics"]["total_files"] += 1
+            backup["statistics"]["total_size_mb"] += stat.st_size / (1024 * 1024)
+            
+            ext = filepath.suffix.lower()
+            backup["statistics"]["by_extension"][ext] = \
+                backup["statistics"]["by_extension"].get(ext, 0) + 1
+    
     # Save backup
-    os.makedirs("data", exist_ok=True)
     backup_file = f"data/{backup_name}.json"
-    
-    with open(backup_file, 'w') as f:
-        json.dump(backup, f, indent=2)
+    atomic_write(backup_file, dumps_json(backup, indent=True))
     
     print(f"\n✅ Full backup created: {backup_file}")
     print(f"📊 Total files: {backup['statistics']['total_files']}")
@@ -262,46 +493,37 @@ def create_full_backup(root_path, backup_name=None):
     
     return backup_file
 
+def scan_json_files(folder, prefix="", suffixes=(".json",)):
+    """DirEntry objects for the JSON files in a folder whose names start with prefix"""
+    try:
+        with os.scandir(folder) as entries:
+            return [
+                entry for entry in entries
+                if entry.name.startswith(prefix) and entry.name.endswith(suffixes) and entry.is_file()
+            ]
+    except FileNotFoundError:
+        return []
+
 def list_backups():
     """List all available backups"""
     backups = []
     
     # Check for backup manifests
-    if Path(BACKUP_FILE).exists():
-        manifest = load_backup_manifest()
-        backups.append({
-            "type": "Organization Backup",
-            "file": BACKUP_FILE,
-            "timestamp": manifest["timestamp"],
-            "files": len(manifest["original_state"])
-        })
-    
-    # Check for archived manifests
-    if Path(ARCHIVE_DIR).exists():
-        for archive in Path(ARCHIVE_DIR).glob("*.json"):
-            try:
-                with open(archive, 'r') as f:
-                    data = json.load(f)
-                backups.append({
-                    "type": "Archived Manifest",
-                    "file": str(archive),
-                    "timestamp": data["timestamp"],
-                    "files": len(data.get("original_state", []))
-                })
-            except:
-                pass
+    manifest_file = current_manifest()
+    if Path(manifest_file).exists():
+        backups.append(backup_summary(manifest_file, "Organization Backup"))
+    
+    # Check for archived manifests (.jsonl, and .json from older versions)
+    for entry in scan_json_files(ARCHIVE_DIR, suffixes=MANIFEST_SUFFIXES):
+        try:
+            backups.append(backup_summary(entry.path, "Archived Manifest", entry.stat()))
+        except:
+            pass
     
     # Check for full backups
-    for backup in Path("data").glob("full_backup_*.json"):
+    for entry in scan_json_files("data", prefix="full_backup_"):
         try:
-            with open(backup, 'r') as f:
-                data = json.load(f)
-            backups.append({
-                "type": "Full Backup",
-                "file": str(backup),
-                "timestamp": data["timestamp"],
-                "files": data["statistics"]["total_files"]
-            })
+            backups.append(backup_summary(entry.path, "Full Backup", entry.stat()))
         except:
             pass
     
@@ -321,7 +543,7 @@ if __name__ == "__main__":
     command = sys.argv[1]
     
     if command == "--revert":
-        manifest_file = sys.argv[2] if len(sys.argv) > 2 else BACKUP_FILE
+        manifest_file = sys.argv[2] if len(sys.argv) > 2 else None
         try:
             success = revert_organization(manifest_file)
             if success:
@@ -1,22 +1,56 @@
+import copy
 import os
-import shutil
-import json
 from pathlib import Path
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from tqdm import tqdm
-import hashlib
+from functools import lru_cache
+from itertools import chain
+from backend.core.backup import create_backup_manifest, file_version, read_json
+from backend.utils.cli import throttled_progress
+from backend.utils.fileio import atomic_write, dumps_json, move_path
 
 PLAN_FILE = "data/plan.json"
-BACKUP_FILE = "data/backup_manifest.json"
+BACKUP_FILE = "data/backup_manifest.jsonl"
+REQUIRED_MOVE_FIELDS = ("file", "new_path", "reason")
+MOVE_WORKERS = 8  # Threads moving files, each working through one destination folder
+
+@lru_cache(maxsize=4)
+def _load_plan_cached(path_str, version):
+    return read_json(path_str)
 
 def load_plan(plan_file=PLAN_FILE):
-    """Load reorganization plan from JSON file"""
+    """Load reorganization plan from JSON file (re-read only when the file changes)"""
     plan_path = Path(plan_file)
     if not plan_path.exists():
         raise FileNotFoundError(f"Plan file not found: {plan_file}")
         
-    with open(plan_path, 'r') as f:
-        return json.load(f)
+    # Callers get their own copy, so changing it cannot alter the cached plan
+    return copy.deepcopy(_load_plan_cached(str(plan_path), file_version(plan_path)))
+
+def missing_sources(root_str, sources):
+    """Indices of sources (relative to root) that do not exist, listing each shared folder once"""
+    by_parent = defaultdict(list)
+    for i, source in enumerate(sources):
+        path = os.path.join(root_str, source)
+        by_parent[os.path.dirname(path)].append((i, path))
+    
+    missing = []
+    for parent, entries in by_parent.items():
+        if len(entries) == 1:
+            names = ()
+        else:
+            try:
+                names = set(os.listdir(parent))
+            except OSError:
+                names = ()
+        
+        # Names not in the listing are checked directly (case-insensitive file systems)
+        missing.extend(
+            i for i, path in entries
+            if os.path.basename(path) not in names and not os.path.exists(path)
+        )
+    return sorted(missing)
 
 def validate_plan(plan, root_path):
     """Validate the reorganization plan"""
@@ -28,82 +62,105 @@ def validate_plan(plan, root_path):
         issues.append("Missing 'moves' key in plan")
         return issues
         
-    # Track destinations to detect conflicts
-    destinations = {}
+    moves = plan.get("moves", [])
     
-    for i, move in enumerate(plan.get("moves", [])):
-        # Check required fields
-        for field in ["file", "new_path", "reason"]:
-            if field not in move:
-                issues.append(f"Move {i}: Missing required field '{field}'")
-                
-        # Check if source exists
-        if "relative_path" in move:
-            source = root / move["relative_path"]
-        else:
-            source = root / move["file"]
-            
-        if not source.exists():
-            issues.append(f"Move {i}: Source file not found: {source}")
-            
-        # Check for destination conflicts
-        dest = move.get("new_path", "")
-        if dest in destinations:
-            issues.append(f"Move {i}: Duplicate destination: {dest}")
-        destinations[dest] = i
-        
-    return issues
-
-def create_backup_manifest(root_path, plan):
-    """Create a backup manifest before moving files"""
-    manifest = {
-        "timestamp": datetime.now().isoformat(),
-        "root_path": str(root_path),
-        "original_state": [],
-        "plan_summary": {
-            "total_moves": len(plan.get("moves", [])),
-            "folders_created": plan.get("folders", [])
-        }
-    }
+    # Check required fields
+    issues.extend(
+        f"Move {i}: Missing required field '{field}'"
+        for i, move in enumerate(moves) for field in REQUIRED_MOVE_FIELDS if field not in move
+    )
     
-    root = Path(root_path).resolve()
+    # Check for destination conflicts (every repeat after the first use)
+    destinations = [move.get("new_path", "") for move in moves]
+    counts = Counter(destinations)
+    if len(counts) < len(destinations):
+        first_use = {dest: i for i, dest in reversed(list(enumerate(destinations)))}
+        issues.extend(
+            f"Move {i}: Duplicate destination: {dest}"
+            for i, dest in enumerate(destinations) if counts[dest] > 1 and first_use[dest] != i
+        )
+    
+    # Only a structurally valid plan is checked against the file system
+    if issues:
+        return issues
     
-    # Record current state of files to be moved
-    for move in plan.get("moves", []):
+    # Check if sources exist
+    sources = [move.get("relative_path", move["file"]) for move in moves]
+    issues.extend(
+        f"Move {i}: Source file not found: {root / sources[i]}"
+        for i in missing_sources(str(root), sources)
+    )
+    
+    return issues
+
+def _move_one(root, move, dry_run, ready_dirs):
+    """Move one file of a plan: (True, source name) or (False, failure details)"""
+    try:
+        # Determine source path
         if "relative_path" in move:
             source = root / move["relative_path"]
         else:
             source = root / move["file"]
             
-        if source.exists():
-            # Calculate file hash for verification
-            file_hash = calculate_file_hash(source) if source.is_file() else None
-            
-            manifest["original_state"].append({
-                "original_path": str(source.relative_to(root)),
-                "new_path": move["new_path"],
-                "file_hash": file_hash,
-                "size": source.stat().st_size if source.exists() else 0,
-                "modified": source.stat().st_mtime if source.exists() else 0
-            })
-    
-    # Save manifest
-    os.makedirs("data", exist_ok=True)
-    with open(BACKUP_FILE, 'w') as f:
-        json.dump(manifest, f, indent=2)
+        dest = root / move["new_path"]
         
-    return manifest
+        if not source.exists():
+            return False, {
+                "file": str(source),
+                "error": "Source file not found"
+            }
+        
+        # Create destination directory (once per folder)
+        if not dry_run and dest.parent not in ready_dirs:
+            os.makedirs(dest.parent, exist_ok=True)
+            ready_dirs.add(dest.parent)
+        
+        # Handle filename conflicts
+        if not dry_run and dest.exists():
+            # Rename with timestamp
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            new_name = f"{dest.stem}_{timestamp}{dest.suffix}"
+            dest = dest.parent / new_name
+            print(f"\n⚠️ Renamed to avoid conflict: {new_name}")
+        
+        # Move the file
+        if not dry_run:
+            move_path(source, dest)
+        
+        return True, source.name
+            
+    except Exception as e:
+        return False, {
+            "file": move.get("file", "unknown"),
+            "error": str(e)
+        }
 
-def calculate_file_hash(filepath, chunk_size=8192):
-    """Calculate SHA256 hash of a file"""
-    sha256_hash = hashlib.sha256()
-    try:
-        with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(chunk_size), b""):
-                sha256_hash.update(chunk)
-        return sha256_hash.hexdigest()
-    except:
-        return None
+def _move_bucket(root, bucket, dry_run, ready_dirs):
+    """Move a group of (index, move) pairs in order, returning (index, outcome) pairs"""
+    ready_dirs = set(ready_dirs)
+    return [(i, _move_one(root, move, dry_run, ready_dirs)) for i, move in bucket]
+
+def _path_key(path):
+    """Path with ".." and case differences removed, for telling whether two paths name the same file"""
+    # Case is folded everywhere: on a case-sensitive file system this only keeps
+    # a few more moves on one thread, while on macOS and Windows it is required
+    return Path(os.path.normcase(os.path.normpath(path)).casefold())
+
+def _group_moves(root, moves):
+    """Group moves by destination folder, or into one group if any move depends on another"""
+    sources = {_path_key(root / move.get("relative_path", move["file"])) for move in moves}
+    buckets = defaultdict(list)
+    for i, move in enumerate(moves):
+        source = _path_key(root / move.get("relative_path", move["file"]))
+        dest = _path_key(root / move["new_path"])
+        
+        # A move whose destination (or a folder above it, or above its source) is
+        # another move's source has to keep its place in the plan order
+        if (dest in sources or not sources.isdisjoint(dest.parents)
+                or not sources.isdisjoint(source.parents)):
+            return [list(enumerate(moves))]
+        buckets[dest.parent].append((i, move))
+    return list(buckets.values())
 
 def perform_file_moves(root_path, plan, dry_run=False):
     """Execute the file reorganization plan"""
@@ -136,53 +193,38 @@ def perform_file_moves(root_path, plan, dry_run=False):
     successful_moves = 0
     failed_moves = []
     
+    # Every 10th move's reason is shown, but no more than ~20 on large plans
+    reason_every = max(10, len(plan["moves"]) // 20)
+    
+    # Destination folders known to exist, so each is created at most once
+    ready_dirs = {root / folder for folder in plan.get("folders", [])}
+    
     print(f"\n🚚 {'Simulating' if dry_run else 'Moving'} {len(plan['moves'])} files...\n")
     
-    for move in tqdm(plan["moves"], desc="Processing files"):
-        try:
-            # Determine source path
-            if "relative_path" in move:
-                source = root / move["relative_path"]
-            else:
-                source = root / move["file"]
-                
-            dest = root / move["new_path"]
-            
-            if not source.exists():
-                failed_moves.append({
-                    "file": str(source),
-                    "error": "Source file not found"
-                })
-                continue
-            
-            # Create destination directory
-            if not dry_run:
-                os.makedirs(dest.parent, exist_ok=True)
-            
-            # Handle filename conflicts
-            if dest.exists() and not dry_run:
-                # Rename with timestamp
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                new_name = f"{dest.stem}_{timestamp}{dest.suffix}"
-                dest = dest.parent / new_name
-                print(f"\n⚠️ Renamed to avoid conflict: {new_name}")
-            
-            # Move the file
-            if not dry_run:
-                shutil.move(str(source), str(dest))
-            
-            successful_moves += 1
-            
-            # Show reason for move (sampling to avoid spam)
-            if successful_moves <= 5 or successful_moves % 10 == 0:
-                print(f"\n✅ {source.name} → {move['new_path']}")
-                print(f"   Reason: {move['reason']}")
-                
-        except Exception as e:
-            failed_moves.append({
-                "file": move.get("file", "unknown"),
-                "error": str(e)
-            })
+    # Moves into different folders run in parallel; each folder's moves stay in
+    # plan order on one thread, so name conflicts are handled as before
+    moves = plan["moves"]
+    outcomes = [None] * len(moves)
+    with ThreadPoolExecutor(max_workers=MOVE_WORKERS) as executor:
+        futures = [
+            executor.submit(_move_bucket, root, bucket, dry_run, ready_dirs)
+            for bucket in _group_moves(root, moves)
+        ]
+        done = chain.from_iterable(future.result() for future in as_completed(futures))
+        for i, outcome in throttled_progress(done, len(moves), "Processing files"):
+            outcomes[i] = outcome
+    
+    for move, (moved, detail) in zip(moves, outcomes):
+        if not moved:
+            failed_moves.append(detail)
+            continue
+        
+        successful_moves += 1
+        
+        # Show reason for move (sampling to avoid spam)
+        if successful_moves <= 5 or successful_moves % reason_every == 0:
+            print(f"\n✅ {detail} → {move['new_path']}")
+            print(f"   Reason: {move['reason']}")
     
     # Summary
     print(f"\n📊 Organization {'Simulation' if dry_run else 'Complete'}!")
@@ -206,8 +248,7 @@ def perform_file_moves(root_path, plan, dry_run=False):
             "folders_created": list(folders_created)
         }
         
-        with open("data/organization_results.json", 'w') as f:
-            json.dump(results, f, indent=2)
+        atomic_write("data/organization_results.json", dumps_json(results, indent=True))
     
     return successful_moves > 0
 
@@ -216,15 +257,20 @@ def cleanup_empty_folders(root_path, dry_run=False):
     root = Path(root_path).resolve()
     empty_folders = []
     
-    # Find empty folders (bottom-up)
-    for folder in sorted(root.rglob("*/"), reverse=True):
-        try:
-            if not any(folder.iterdir()):
-                empty_folders.append(folder)
+    # Find empty folders (bottom-up: os.walk yields children before parents).
+    # A folder counts as empty when it has no files and all its subfolders were empty
+    emptied = set()
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        if dirpath == str(root) or filenames:
+            continue
+        if all(os.path.join(dirpath, name) in emptied for name in dirnames):
+            try:
                 if not dry_run:
-                    folder.rmdir()
-        except:
-            pass
+                    os.rmdir(dirpath)
+                emptied.add(dirpath)
+                empty_folders.append(Path(dirpath))
+            except:
+                pass
     
     if empty_folders:
         print(f"\n🧹 {'Would remove' if dry_run else 'Removed'} {len(empty_folders)} empty folders")
@@ -256,7 +302,7 @@ if __name__ == "__main__":
             cleanup_empty_folders(scan_dir, dry_run=dry_run)
             
             print("\n✨ Organization complete!")
-            print("💾 Backup manifest saved to: data/backup_manifest.json")
+            print("💾 Backup manifest saved to: data/backup_manifest.jsonl")
             print("🔄 To revert changes, run: python backup.py --revert")
             
     except FileNotFoundError:
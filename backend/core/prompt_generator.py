@@ -1,81 +1,56 @@
+import hashlib
 import json
 import os
+import random
+from heapq import nlargest
+from operator import itemgetter
 from pathlib import Path
 from datetime import datetime
-from backend.core.scanner import scan_directory, summarize_files_for_llm, analyze_folder_structure
+from backend.config.settings import Config
+from backend.core.scanner import scan_directory, summarize_files_for_llm, analyze_folder_structure, tree_stats
+from backend.utils.fileio import atomic_open, atomic_write, dumps_json, loads_json
 
 # Configuration
 MAX_FILES = 50  # Adjust based on token limits
 MAX_SNIPPET_CHARS = 150
+SCAN_CACHE_LIMIT = 8  # Cached scans kept in data/
 
-def generate_konmari_prompt(scan_path, max_files=MAX_FILES):
-    """Generate an optimized prompt following KonMari principles"""
-    
-     # Load organization memory
-    memory = load_organization_memory(scan_path)
-     # Add memory context to prompt
-    memory_context = ""
-    if memory:
-        memory_context = f"""
-    **Previous Organization Context:**
-    - Last organized: {memory['timestamp']}
-    - Existing folder structure: {', '.join(memory['folders_created'])}
-    - Known patterns: {json.dumps(memory['organization_patterns'], indent=2)}
-    
-    Please maintain consistency with the existing organization structure and extend it for new files.
-    """
+# Filler words dropped from content snippets when Config.COMPRESS_PROMPT_SNIPPETS is set
+SNIPPET_STOPWORDS = frozenset({
+    'a', 'an', 'the', 'and', 'or', 'but', 'of', 'to', 'in', 'on', 'at', 'by', 'for',
+    'with', 'from', 'as', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'it',
+    'its', 'this', 'that', 'these', 'those', 'there', 'then', 'than', 'so', 'such',
+    'if', 'into', 'onto', 'over', 'also', 'very', 'just', 'which', 'who', 'whom',
+    'will', 'would', 'should', 'can', 'could', 'has', 'have', 'had', 'do', 'does', 'did'
+})
 
-    # Load or generate scan results
-    scan_results_path = Path("data/scan_results.json")
-    
-    if scan_results_path.exists():
-        print("📂 Loading existing scan results...")
-        with open(scan_results_path, 'r') as f:
-            scan_data = json.load(f)
-        files = scan_data["files"]
-        analysis = scan_data["analysis"]
-    else:
-        print("🔍 Scanning directory...")
-        analysis = analyze_folder_structure(scan_path)
-        files = scan_directory(scan_path, max_files=max_files)
-        
-    # Summarize files for LLM
-    summarized = summarize_files_for_llm(files, MAX_SNIPPET_CHARS)
-    
-    # Sample files if too many
-    if len(summarized) > max_files:
-        print(f"📊 Sampling {max_files} files from {len(summarized)} total...")
-        # Take a diverse sample
-        summarized = sample_diverse_files(summarized, max_files)
-    
-    # Build file listing
-    file_listing = []
-    for f in summarized:
-        snippet = f['content_snippet'].replace('\n', ' ').strip()
-        if len(snippet) > 100:
-            snippet = snippet[:97] + "..."
-            
-        file_entry = f"""- **{f['name']}**
-        Path: {f['relative_path']}
-        Type: {f['extension'] or 'no-ext'} | Size: {f['size_kb']}KB
-        Modified: {f['modified'][:10]}
+def compress_snippet(snippet):
+    """Remove common filler words from a content snippet"""
+    return ' '.join(word for word in snippet.split() if word.lower() not in SNIPPET_STOPWORDS)
+
+# Snippets at least this long are listed once when several files share them
+MIN_GROUPED_SNIPPET_CHARS = 40
+SIMHASH_MAX_DISTANCE = 3  # Snippet SimHashes differing in at most this many bits count as the same content
+
+# Line breaks in snippets become spaces so each entry stays on its lines
+SNIPPET_LINE_BREAKS = str.maketrans("\r\n", "  ")
+
+# One entry of the prompt's file listing
+FILE_ENTRY_TEMPLATE = """- **{name}**
+        Path: {relative_path}
+        Type: {extension} | Size: {size_kb}KB
+        Modified: {modified}
         Content: {snippet}"""
-        file_listing.append(file_entry)
-    
-    # Create the prompt
-    prompt = f"""You are an expert file organization assistant using the KonMari Method principles.
-    {memory_context}
 
-    **Current Situation:**
-    - Root directory has {len(files)} files needing organization
-    - Found {len(analysis['organized_folders'])} already well-organized folders to preserve
-    - Most common file types: {', '.join(get_top_extensions(analysis['file_types'], 5))}
+# Instructions shared by every prompt. They come first so that repeated
+# requests start with an identical prefix the API can serve from its prompt cache
+PROMPT_INSTRUCTIONS = """You are an expert file organization assistant using the KonMari Method principles.
 
     **Organization Principles:**
     1. **Joy & Purpose**: Group files by their purpose and usage intent
     2. **Categories over Location**: Create clear category folders (Work, Personal, Archive, etc.)
     3. **Consolidation**: Merge similar/duplicate content intelligently
-    4. **Preservation**: Keep these organized folders intact: {', '.join(analysis['organized_folders'][:5])}
+    4. **Preservation**: Keep the already well-organized folders listed below intact
     5. **Clarity**: Use clear, descriptive folder names that "spark joy"
 
     **Your Task:**
@@ -87,7 +62,7 @@ def generate_konmari_prompt(scan_path, max_files=MAX_FILES):
     - Provides clear reasoning for each move
 
     **Output Format (JSON):**
-    {{
+    {
         "folders": [
             "Work/Documents",
             "Work/Projects/Active",
@@ -97,21 +72,18 @@ def generate_konmari_prompt(scan_path, max_files=MAX_FILES):
             // ... more folders
         ],
         "moves": [
-            {{
+            {
                 "file": "filename.ext",
                 "relative_path": "current/path/filename.ext",
                 "new_path": "Work/Documents/filename.ext",
                 "reason": "Work-related document based on content about project planning"
-            }},
+            },
             // ... more moves
         ],
         "preserve": [
             // Folders that should not be reorganized
         ]
-    }}
-
-    **Files to Organize:**
-    {chr(10).join(file_listing)}
+    }
 
     **Important Notes:**
     - For Git repositories (.git folders), keep the parent project folder intact
@@ -119,51 +91,230 @@ def generate_konmari_prompt(scan_path, max_files=MAX_FILES):
     - Use dates in folder names when relevant (e.g., "Photos/2024-05-Hawaii")
     - Create an "Archive" folder for old/inactive items
     - Suggest "Review" folder for items needing user decision
+"""
+
+def scan_cache_path(scan_path, max_files):
+    """Cache file for a scan, keyed on the folder and a fingerprint of its top level"""
+    root = Path(scan_path).resolve()
+    digest = hashlib.blake2b(f"{root}:{max_files}:{os.stat(root).st_mtime_ns}".encode(), digest_size=8)
+    
+    # Top-level mtimes catch most changes one level down without a full walk
+    with os.scandir(root) as entries:
+        for name, mtime_ns in sorted((e.name, e.stat(follow_symlinks=False).st_mtime_ns) for e in entries):
+            digest.update(f"{name}\0{mtime_ns}\0".encode())
+    
+    return Path("data") / f"scan_cache_{digest.hexdigest()}.json"
+
+def prune_scan_cache(limit=SCAN_CACHE_LIMIT):
+    """Remove the oldest cached scans beyond the limit"""
+    cached = sorted(Path("data").glob("scan_cache_*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in cached[limit:]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+
+def load_or_scan(scan_path, max_files=MAX_FILES):
+    """Scan a folder, reusing a cached scan while the folder looks unchanged"""
+    try:
+        cache_file = scan_cache_path(scan_path, max_files)
+    except OSError:
+        cache_file = None
+    
+    if cache_file is not None and cache_file.exists():
+        print("📂 Loading cached scan...")
+        cached = loads_json(cache_file.read_bytes())
+        return cached["files"], cached["analysis"]
+    
+    print("🔍 Scanning directory...")
+    tree = tree_stats(scan_path)
+    analysis = analyze_folder_structure(scan_path, tree=tree)
+    files = scan_directory(scan_path, max_files=max_files, tree=tree)
+    
+    if cache_file is not None:
+        atomic_write(cache_file, dumps_json({"analysis": analysis, "files": files}))
+        prune_scan_cache()
+    
+    return files, analysis
+
+def generate_konmari_prompt(scan_path, max_files=MAX_FILES):
+    """Generate an optimized prompt following KonMari principles"""
+    return "".join(iter_konmari_prompt(scan_path, max_files))
+
+def iter_konmari_prompt(scan_path, max_files=MAX_FILES):
+    """Yield the KonMari prompt section by section"""
+    
+     # Load organization memory
+    memory = load_organization_memory(scan_path)
+     # Add memory context to prompt
+    memory_context = ""
+    if memory:
+        memory_context = f"""
+    **Previous Organization Context:**
+    - Last organized: {memory['timestamp']}
+    - Existing folder structure: {', '.join(memory['folders_created'])}
+    - Known patterns: {json.dumps(memory['organization_patterns'], indent=2)}
+    
+    Please maintain consistency with the existing organization structure and extend it for new files.
+    """
+
+    # Load or generate scan results
+    scan_results_path = Path("data/scan_results.json")
+    
+    if scan_results_path.exists():
+        print("📂 Loading existing scan results...")
+        scan_data = loads_json(scan_results_path.read_bytes())
+        files = scan_data["files"]
+        analysis = scan_data["analysis"]
+    else:
+        files, analysis = load_or_scan(scan_path, max_files)
+        
+    # Summarize files for LLM
+    summarized = summarize_files_for_llm(files, MAX_SNIPPET_CHARS)
+    
+    # Sample files if too many
+    if len(summarized) > max_files:
+        print(f"📊 Sampling {max_files} files from {len(summarized)} total...")
+        # Take a diverse sample
+        summarized = sample_diverse_files(summarized, max_files, seed=str(scan_path))
+    
+    # Create the prompt (fixed instructions first, this folder's details after)
+    yield PROMPT_INSTRUCTIONS
+    yield f"""{memory_context}
+
+    **Current Situation:**
+    - Root directory has {len(files)} files needing organization
+    - Found {len(analysis['organized_folders'])} already well-organized folders to preserve: {', '.join(analysis['organized_folders'][:5])}
+    - Most common file types: {', '.join(get_top_extensions(analysis['file_types'], 5))}
+
+    **Files to Organize:**
+    """
+    
+    # Near-duplicate snippets are listed once and referenced by group when enabled
+    rows = list(file_listing_rows(summarized))
+    shared = group_similar_snippets(rows) if Config.GROUP_PROMPT_SNIPPETS else []
+    if shared:
+        yield "Shared content (referenced as [same as G#] below):\n"
+        for label, snippet in shared:
+            yield f"        {label}: {snippet}\n"
+        yield "    "
+    
+    # File listing, one entry at a time
+    for i, row in enumerate(rows):
+        yield ("\n" if i else "") + FILE_ENTRY_TEMPLATE.format_map(row)
+    
+    yield """
 
     Generate the complete reorganization plan:"""
 
-    return prompt
+def file_listing_rows(summarized):
+    """Yield the fields of each file entry in the prompt's file listing"""
+    for f in summarized:
+        snippet = f['content_snippet'].translate(SNIPPET_LINE_BREAKS).strip()
+        if Config.COMPRESS_PROMPT_SNIPPETS:
+            snippet = compress_snippet(snippet)
+        if len(snippet) > 100:
+            snippet = snippet[:97] + "..."
+        
+        yield {
+            "name": f['name'],
+            "relative_path": f['relative_path'],
+            "extension": f['extension'] or 'no-ext',
+            "size_kb": f['size_kb'],
+            "modified": f['modified'][:10],
+            "snippet": snippet,
+        }
+
+def simhash(text, width=3):
+    """64-bit SimHash of a text over word shingles"""
+    words = text.split()
+    shingles = [' '.join(words[i:i + width]) for i in range(max(1, len(words) - width + 1))]
+    
+    weights = [0] * 64
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+def group_near_duplicates(hashes, max_distance=SIMHASH_MAX_DISTANCE):
+    """Group indices of 64-bit hashes within max_distance differing bits of a group's first hash"""
+    # With 4 bands of 16 bits, hashes differing in at most 3 bits share at least one
+    # band exactly, so only groups found through a band need comparing
+    band_count = 4
+    bands = [{} for _ in range(band_count)]  # band value -> group numbers
+    groups = []  # (first hash, member indices)
+    for index, value in enumerate(hashes):
+        keys = [value >> (16 * band) & 0xFFFF for band in range(band_count)]
+        candidates = sorted({group for band, key in enumerate(keys) for group in bands[band].get(key, ())})
+        for group in candidates:
+            if bin(groups[group][0] ^ value).count("1") <= max_distance:
+                groups[group][1].append(index)
+                break
+        else:
+            for band, key in enumerate(keys):
+                bands[band].setdefault(key, []).append(len(groups))
+            groups.append((value, [index]))
+    return [members for _, members in groups]
+
+def group_similar_snippets(rows, min_chars=MIN_GROUPED_SNIPPET_CHARS):
+    """Replace near-duplicate snippets with a group reference, returning [(label, snippet)]"""
+    candidates = [row for row in rows if len(row["snippet"]) >= min_chars]
+    groups = group_near_duplicates([simhash(row["snippet"]) for row in candidates])
+    
+    shared = []
+    for members in groups:
+        if len(members) < 2:
+            continue
+        label = f"G{len(shared) + 1}"
+        shared.append((label, candidates[members[0]]["snippet"]))
+        for index in members:
+            candidates[index]["snippet"] = f"[same as {label}]"
+    return shared
 
-def sample_diverse_files(files, target_count):
-    """Sample diverse files to get good representation"""
+def sample_diverse_files(files, target_count, seed=None):
+    """Sample files stratified by extension, in proportion to each type's share"""
     # Group by extension
     by_extension = {}
     for f in files:
         ext = f['extension'] or 'no-ext'
-        if ext not in by_extension:
-            by_extension[ext] = []
-        by_extension[ext].append(f)
+        by_extension.setdefault(ext, []).append(f)
     
-    sampled = []
+    # At least one of each type, the rest proportional to how common it is
+    total = len(files)
+    alloc = {
+        ext: min(len(ext_files), max(1, round(target_count * len(ext_files) / total)))
+        for ext, ext_files in by_extension.items()
+    }
+    
+    # Fix rounding so exactly target_count files are taken
+    while sum(alloc.values()) > target_count:
+        # Trim the largest allocation (the later type on ties)
+        ext = max(reversed(list(alloc)), key=alloc.get)
+        alloc[ext] -= 1
     
-    # First, take at least one of each type
+    # Hand slots lost to rounding to the most common types with files to spare
+    shortfall = min(target_count, total) - sum(alloc.values())
+    while shortfall > 0:
+        spare = [ext for ext in by_extension if alloc[ext] < len(by_extension[ext])]
+        for ext in nlargest(shortfall, spare, key=lambda ext: len(by_extension[ext])):
+            alloc[ext] += 1
+            shortfall -= 1
+    
+    # Seeded so the same folder gives the same sample (and the same prompt) each run
+    rng = random.Random(seed)
+    sampled = []
     for ext, ext_files in by_extension.items():
-        if len(sampled) < target_count:
-            sampled.append(ext_files[0])
-    
-    # Then add more files proportionally
-    remaining = target_count - len(sampled)
-    if remaining > 0:
-        # Sort extensions by frequency
-        sorted_exts = sorted(by_extension.items(), key=lambda x: len(x[1]), reverse=True)
-        
-        while len(sampled) < target_count and any(len(files) > 1 for _, files in sorted_exts):
-            for ext, ext_files in sorted_exts:
-                if len(ext_files) > 1 and len(sampled) < target_count:
-                    # Take next file not already sampled
-                    for f in ext_files[1:]:
-                        if f not in sampled:
-                            sampled.append(f)
-                            break
+        picks = sorted(rng.sample(range(len(ext_files)), alloc[ext]))
+        sampled.extend(ext_files[i] for i in picks)
     
-    return sampled[:target_count]
+    return sampled
 
 def load_organization_memory(folder_path):
     """Load previous organization schema"""
     memory_file = Path(folder_path) / '.file_organizer_memory.json'
     if memory_file.exists():
-        with open(memory_file, 'r') as f:
-            return json.load(f)
+        return loads_json(memory_file.read_bytes())
     return None
 
 def save_organization_memory(folder_path, plan):
@@ -185,24 +336,33 @@ def save_organization_memory(folder_path, plan):
             memory['organization_patterns'][file_type].append(dest_folder)
     
     memory_file = Path(folder_path) / '.file_organizer_memory.json'
-    with open(memory_file, 'w') as f:
-        json.dump(memory, f, indent=2)
+    atomic_write(memory_file, dumps_json(memory, indent=True))
 
 
 def get_top_extensions(file_types, n=5):
     """Get top N file extensions by count"""
-    sorted_types = sorted(file_types.items(), key=lambda x: x[1], reverse=True)
-    return [f"{ext}({count})" for ext, count in sorted_types[:n]]
+    return [f"{ext}({count})" for ext, count in nlargest(n, file_types.items(), key=itemgetter(1))]
 
 def save_prompt(prompt, filename="gpt_prompt.txt"):
     """Save prompt to file"""
-    os.makedirs("data", exist_ok=True)
+    filepath, _, _ = save_prompt_stream([prompt], filename)
+    return filepath
+
+def save_prompt_stream(chunks, filename="gpt_prompt.txt", preview_chars=500):
+    """Write prompt chunks to file as they are produced, returning (path, preview, length)"""
     filepath = Path("data") / filename
+    preview = []
+    length = 0
     
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write(prompt)
+    # Replace the file in one step so readers never see a partial prompt
+    with atomic_open(filepath) as f:
+        for chunk in chunks:
+            f.write(chunk.encode("utf-8"))
+            if length < preview_chars:
+                preview.append(chunk[:preview_chars - length])
+            length += len(chunk)
     
-    return filepath
+    return filepath, "".join(preview), length
 
 def generate_and_send_prompt(scan_path, api_key=None):
     """Generate prompt and optionally send to OpenAI"""
@@ -219,8 +379,7 @@ def generate_and_send_prompt(scan_path, api_key=None):
         if response:
             # Save plan
             plan_path = Path("data/plan.json")
-            with open(plan_path, "w") as f:
-                json.dump(response, f, indent=2)
+            atomic_write(plan_path, dumps_json(response, indent=True))
             print(f"✅ Plan saved to: {plan_path}")
             return response
     else:
@@ -237,10 +396,16 @@ def send_to_openai(prompt, api_key):
     try:
         import openai
         
-        client = openai.OpenAI(api_key=api_key)
+        # The client retries connection errors, rate limits and 5xx responses
+        # with exponential backoff
+        client = openai.OpenAI(
+            api_key=api_key,
+            timeout=Config.OPENAI_TIMEOUT_SECONDS,
+            max_retries=Config.OPENAI_MAX_RETRIES
+        )
         
         response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
+            model=Config.OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": "You are a file organization expert. Always respond with valid JSON."},
                 {"role": "user", "content": prompt}
@@ -250,7 +415,7 @@ def send_to_openai(prompt, api_key):
         )
         
         result = response.choices[0].message.content
-        return json.loads(result)
+        return loads_json(result)
         
     except Exception as e:
         print(f"❌ Error calling OpenAI API: {e}")
@@ -1,11 +1,15 @@
+import io
 import os
-import json
+import re
+import stat as stat_module
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 from datetime import datetime
-from docx import Document
-import fitz  # PyMuPDF
-from tqdm import tqdm
-import mimetypes
+from backend.utils.fileio import atomic_write, dumps_json
 
 TEXT_EXTENSIONS = {
     '.txt', '.md', '.py', '.js', '.html', '.css', '.sh', '.java', '.c', '.cpp', 
@@ -25,7 +29,26 @@ SKIP_FOLDERS = {
     '.mypy_cache', '.tox', 'coverage', '.coverage'
 }
 
+# Threads used to list folders in parallel while scanning
+SCAN_WORKERS = 8
+SCANDIR_BY_FD = os.scandir in os.supports_fd and hasattr(os, "O_DIRECTORY")  # POSIX
+
+# On macOS, FILEORG_BULK_LISTING=1 lists folders with getattrlistbulk (name, type,
+# times and size in bulk) instead of scandir; off by default
+bulk_list_dir = None
+if sys.platform == "darwin" and os.getenv("FILEORG_BULK_LISTING") == "1":
+    try:
+        from backend.core._bulkwalk_darwin import list_dir as bulk_list_dir
+    except (ImportError, OSError, AttributeError):
+        bulk_list_dir = None
+
+# PyMuPDF is not thread-safe, so PDF snippets are read one at a time
+# (the API can run scans of different folders on several threads)
+_PDF_LOCK = threading.Lock()
+
+@lru_cache(maxsize=4096)
 def format_timestamp(timestamp):
+    # Called with whole seconds, so files touched together share one entry
     return datetime.fromtimestamp(timestamp).isoformat()
 
 def get_depth(root_path, current_path):
@@ -34,185 +57,407 @@ def get_depth(root_path, current_path):
     except ValueError:
         return 0
 
-def should_skip_path(path: Path) -> bool:
-    """Check if path should be skipped based on rules"""
+def _split_suffix(name):
+    """(stem, suffix) of a file name, the same as Path.stem and Path.suffix"""
+    i = name.rfind('.')
+    if 0 < i < len(name) - 1:
+        return name[:i], name[i:]
+    return name, ''
+
+def should_skip_path(path: Path, stat=None) -> bool:
+    """Check if path should be skipped based on rules (stat: the path's stat result, if known)"""
     # Skip hidden files/folders
     if path.name.startswith('.'):
         return True
     
-    # Skip system folders
-    for skip in SKIP_FOLDERS:
-        if skip in path.parts:
-            return True
+    # Skip system folders (one set intersection instead of a loop per folder name)
+    if not SKIP_FOLDERS.isdisjoint(path.parts):
+        return True
     
-    # Skip empty files (except certain types)
-    if path.is_file() and path.stat().st_size == 0 and path.suffix not in {'.txt', '.md'}:
+    # Skip empty files (except certain types), with one stat at most
+    if stat is None:
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+    if stat_module.S_ISREG(stat.st_mode) and stat.st_size == 0 and path.suffix not in {'.txt', '.md'}:
         return True
         
     return False
 
-def read_content_snippet(filepath: Path, max_chars=500):
-    """Extract meaningful content snippet from file"""
+def should_skip_dir(directory: Path) -> bool:
+    """Check if files directly inside a folder should be skipped"""
+    return directory.name.startswith('.') or not SKIP_FOLDERS.isdisjoint(directory.parts)
+
+def _iter_entries(directory: Path):
+    """Yield a folder's entries (os.DirEntry, or BulkEntry on macOS)"""
+    if bulk_list_dir is not None:
+        try:
+            entries = bulk_list_dir(directory)
+        except OSError:
+            entries = None  # Let scandir try (and report) it
+        if entries is not None:
+            yield from entries
+            return
+    
+    fd = None
     try:
-        mime_type, _ = mimetypes.guess_type(str(filepath))
-        
-        if filepath.suffix.lower() in TEXT_EXTENSIONS:
-            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read(max_chars)
-                # Clean up whitespace
-                content = ' '.join(content.split())
-                return content[:max_chars]
-
-        elif filepath.suffix.lower() == ".pdf":
-            doc = fitz.open(filepath)
-            text = ""
+        if SCANDIR_BY_FD:
+            # Listing through a folder fd makes each entry's stat an fstatat
+            # relative to it, instead of resolving the full path again
+            fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        with os.scandir(directory if fd is None else fd) as entries:
+            yield from entries
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+def _scan_dir(directory: Path, prune=frozenset()):
+    """List one folder: (files with their stat results, subfolders to descend into)"""
+    files = []
+    subdirs = []
+    
+    # Files sitting directly in a hidden or skipped folder are left out
+    skip_files = should_skip_dir(directory)
+    directory_str = str(directory)
+    
+    try:
+        for entry in _iter_entries(directory):
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            
+            if is_dir:
+                # Like os.walk: prune skipped folders, don't follow folder symlinks
+                if (entry.name not in SKIP_FOLDERS and not entry.is_symlink()
+                        and os.path.join(directory_str, entry.name) not in prune):
+                    subdirs.append(directory / entry.name)
+                continue
+            
+            if skip_files or entry.name.startswith('.') or entry.name in SKIP_FOLDERS:
+                continue
+            
+            filepath = os.path.join(directory_str, entry.name)
+            try:
+                stat = entry.stat()
+            except OSError:
+                stat = None  # Reported when the file's metadata is read
+            
+            # Skip empty files (except certain types)
+            if (stat is not None and stat_module.S_ISREG(stat.st_mode)
+                    and stat.st_size == 0 and _split_suffix(entry.name)[1] not in {'.txt', '.md'}):
+                continue
+            
+            files.append((filepath, stat))
+    except OSError:
+        pass
+    
+    return files, subdirs
+
+def walk_files(root_path: Path, prune=frozenset()):
+    """List (path string, stat) for every file to scan, in the same order as os.walk"""
+    # prune holds folder path strings whose subtrees are not listed at all
+    listings = {}
+    level = [root_path]
+    scan_dir = partial(_scan_dir, prune=prune)
+    
+    # List each depth of the tree in parallel
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        while level:
+            next_level = []
+            for directory, listing in zip(level, executor.map(scan_dir, level)):
+                listings[directory] = listing
+                next_level.extend(listing[1])
+            level = next_level
+    
+    # Reassemble top-down: a folder's files, then each subfolder in turn
+    ordered = []
+    stack = [root_path]
+    while stack:
+        files, subdirs = listings[stack.pop()]
+        ordered.extend(files)
+        stack.extend(reversed(subdirs))
+    return ordered
+
+# ASCII control characters; any of them makes a text prefix unprintable
+CONTROL_BYTES = re.compile(rb'[\x00-\x1f\x7f]')
+
+def _read_chars(f, count):
+    """Read up to count characters from a binary file, as UTF-8 with errors ignored"""
+    raw = f.read(count)
+    if raw.isascii() and b'\r' not in raw:
+        # One byte per character and no newline translation: skip the text layer
+        return raw.decode('ascii')
+    f.seek(0)
+    return io.TextIOWrapper(f, encoding='utf-8', errors='ignore').read(count)
+
+def _read_text(filepath, max_chars):
+    with open(filepath, 'rb') as f:
+        content = _read_chars(f, max_chars)
+    # Clean up whitespace
+    content = ' '.join(content.split())
+    return content[:max_chars]
+
+def _read_pdf(filepath, max_chars):
+    import fitz  # PyMuPDF; imported on first use since it is slow to load
+    with _PDF_LOCK:
+        # filetype skips content sniffing; only the text still needed is kept
+        with fitz.open(filepath, filetype="pdf") as doc:
+            parts = []
+            remaining = max_chars
             for i, page in enumerate(doc):
-                if i >= 2:  # Only first 2 pages
+                if i >= 2 or remaining <= 0:  # Only first 2 pages
                     break
-                text += page.get_text()
-                if len(text) >= max_chars:
-                    break
-            doc.close()
-            return ' '.join(text[:max_chars].split())
+                text = page.get_text()
+                parts.append(text[:remaining])
+                remaining -= len(text)
+    return ' '.join(''.join(parts).split())
 
-        elif filepath.suffix.lower() in {".docx", ".doc"}:
-            doc = Document(filepath)
-            full_text = "\n".join([para.text for para in doc.paragraphs[:5]])
-            return ' '.join(full_text[:max_chars].split())
+def _read_docx(filepath, max_chars):
+    from docx import Document  # Imported on first use since it is slow to load
+    doc = Document(filepath)
+    full_text = "\n".join([para.text for para in doc.paragraphs[:5]])
+    return ' '.join(full_text[:max_chars].split())
 
-        elif filepath.suffix.lower() in IMAGE_EXTENSIONS:
-            return f"[Image: {filepath.stem}]"
+def _read_no_extension(filepath, max_chars):
+    # Try to read as text for files without extension
+    try:
+        with open(filepath, 'rb') as f:
+            # Control bytes up front (binary files) rule it out without decoding
+            if not CONTROL_BYTES.search(f.read(100)):
+                f.seek(0)
+                content = _read_chars(f, 100)
+                if content.isprintable():
+                    return content[:max_chars]
+    except:
+        pass
+    return f"[No extension: {os.path.basename(filepath)}]"
 
-        elif filepath.suffix.lower() in VIDEO_EXTENSIONS:
-            return f"[Video: {filepath.stem}]"
-            
-        elif filepath.suffix.lower() in AUDIO_EXTENSIONS:
-            return f"[Audio: {filepath.stem}]"
+def _label_other(filepath, max_chars):
+    name = os.path.basename(filepath)
+    return f"[{_split_suffix(name)[1].upper()[1:]} file: {name}]"
 
-        elif filepath.suffix.lower() in ARCHIVE_EXTENSIONS:
-            return f"[Archive: {filepath.name}]"
+def _label_name(label):
+    """Snippet reader that only names the file, e.g. [Archive: photos.zip]"""
+    return lambda filepath, max_chars: f"[{label}: {os.path.basename(filepath)}]"
 
-        elif filepath.suffix == "":
-            # Try to read as text for files without extension
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read(100)
-                    if content.isprintable():
-                        return content[:max_chars]
-            except:
-                pass
-            return f"[No extension: {filepath.name}]"
-
-        else:
-            return f"[{filepath.suffix.upper()[1:]} file: {filepath.name}]"
-            
+def _label_stem(label):
+    """Snippet reader that only names the file without its suffix, e.g. [Image: holiday]"""
+    return lambda filepath, max_chars: f"[{label}: {_split_suffix(os.path.basename(filepath))[0]}]"
+
+# Extension -> snippet reader, built once (later entries win, so text beats
+# the other kinds, as it did when the checks were an if/elif chain)
+SNIPPET_READERS = {
+    **dict.fromkeys(ARCHIVE_EXTENSIONS, _label_name("Archive")),
+    **dict.fromkeys(AUDIO_EXTENSIONS, _label_stem("Audio")),
+    **dict.fromkeys(VIDEO_EXTENSIONS, _label_stem("Video")),
+    **dict.fromkeys(IMAGE_EXTENSIONS, _label_stem("Image")),
+    **dict.fromkeys({".docx", ".doc"}, _read_docx),
+    ".pdf": _read_pdf,
+    **dict.fromkeys(TEXT_EXTENSIONS, _read_text),
+    "": _read_no_extension,
+}
+
+def read_content_snippet(filepath, max_chars=500, size=None):
+    """Extract meaningful content snippet from file (a path string or Path; size if already known)"""
+    try:
+        filepath = os.fspath(filepath)
+        suffix = _split_suffix(os.path.basename(filepath))[1]
+        reader = SNIPPET_READERS.get(suffix.lower(), _label_other)
+        if size == 0 and reader in (_read_text, _read_no_extension):
+            return ""  # Nothing to read, so don't open it
+        return reader(filepath, max_chars)
     except Exception as e:
         return f"[Error reading: {str(e)[:50]}]"
 
-def is_organized_folder(folder_path: Path, threshold=0.8) -> bool:
-    """Detect if a folder is already well-organized"""
-    try:
-        files = list(folder_path.rglob("*"))
-        if len(files) < 3:
+# Files that mark a folder as a project
+PROJECT_INDICATORS = {
+    'package.json', 'requirements.txt', 'setup.py', 'Cargo.toml',
+    'go.mod', 'pom.xml', 'build.gradle', 'CMakeLists.txt',
+    'Makefile', 'README.md', 'LICENSE', '.gitignore'
+}
+
+class FolderStats:
+    """Totals for everything below a folder, as is_organized_folder looks at it"""
+    __slots__ = ("entries", "has_indicator", "extensions", "stems", "prefix")
+    
+    def __init__(self):
+        self.entries = 0  # Files and folders at any depth
+        self.has_indicator = False
+        self.extensions = Counter()
+        self.stems = 0  # Number of files, with prefix their common stem prefix
+        self.prefix = None
+    
+    def add_file(self, name):
+        stem, suffix = _split_suffix(name)
+        if name in PROJECT_INDICATORS:
+            self.has_indicator = True
+        if suffix:
+            self.extensions[suffix] += 1
+        self.add_stems(1, stem)
+    
+    def add_stems(self, count, prefix):
+        if count:
+            self.prefix = prefix if self.prefix is None else os.path.commonprefix((self.prefix, prefix))
+            self.stems += count
+    
+    def merge(self, child):
+        self.entries += child.entries
+        self.has_indicator = self.has_indicator or child.has_indicator
+        self.extensions.update(child.extensions)
+        self.add_stems(child.stems, child.prefix)
+    
+    def is_organized(self, threshold=0.8) -> bool:
+        if self.entries < 3:
             return False
-            
-        # Check for project indicators
-        project_indicators = {
-            'package.json', 'requirements.txt', 'setup.py', 'Cargo.toml',
-            'go.mod', 'pom.xml', 'build.gradle', 'CMakeLists.txt',
-            'Makefile', 'README.md', 'LICENSE', '.gitignore'
-        }
         
-        file_names = {f.name for f in files if f.is_file()}
-        if any(indicator in file_names for indicator in project_indicators):
+        # Project indicators, extension consistency, then a shared naming pattern
+        if self.has_indicator:
             return True
-            
-        # Check extension consistency
-        extensions = [f.suffix for f in files if f.is_file() and f.suffix]
-        if extensions:
-            most_common_ext_count = max(extensions.count(ext) for ext in set(extensions))
-            if most_common_ext_count / len(extensions) >= threshold:
-                return True
-                
-        # Check naming patterns
-        names = [f.stem for f in files if f.is_file()]
-        if len(names) > 3:
-            # Check for common prefixes or patterns
-            common_prefix = os.path.commonprefix(names)
-            if len(common_prefix) > 3:
-                return True
-                
-        return False
+        total = sum(self.extensions.values())
+        if total and max(self.extensions.values()) / total >= threshold:
+            return True
+        return self.stems > 3 and len(self.prefix) > 3
+
+def _folder_stats(path, folders, files, follow_links=True):
+    """Total a folder's subtree in one scandir pass, collecting its subfolders and files"""
+    # Subfolders go into folders (path -> FolderStats) in Path.rglob("*/") order and
+    # files into files as (folder, DirEntry). Like rglob, folder symlinks are listed
+    # but not walked into; with follow_links each one is judged on its own contents,
+    # without following the symlinks inside it
+    root = FolderStats()
+    walked = []  # (stats, parent stats) in walk order, totalled bottom-up afterwards
+    stack = [(path, root, None)]
+    while stack:
+        path, stats, parent = stack.pop()
+        walked.append((stats, parent))
+        subdirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    stats.entries += 1
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    
+                    if is_dir:
+                        subdirs.append(entry)
+                    else:
+                        try:
+                            is_file = entry.is_file()
+                        except OSError:
+                            is_file = False
+                        if is_file:
+                            stats.add_file(entry.name)
+                            if files is not None:
+                                files.append((path, entry))
+        except OSError:
+            pass
         
+        children = []
+        for entry in subdirs:
+            if entry.is_symlink():
+                # Not counted as part of this folder
+                if follow_links:
+                    folders[entry.path] = _folder_stats(entry.path, {}, None, follow_links=False)
+            else:
+                child = folders[entry.path] = FolderStats()
+                children.append((entry.path, child, stats))
+        stack.extend(reversed(children))
+    
+    # Every folder comes after its parent in walk order, so children are complete first
+    for stats, parent in reversed(walked):
+        if parent is not None:
+            parent.merge(stats)
+    return root
+
+def tree_stats(root_path):
+    """Folder totals and files under a root, as (folders, files) for analyze_folder_structure and scan_directory"""
+    # Walked fresh on every call; a caller that analyzes and then scans straight
+    # away can pass the result to both, so the tree is only walked once
+    folders = {}
+    files = []
+    _folder_stats(str(Path(root_path).resolve()), folders, files)
+    return folders, files
+
+def is_organized_folder(folder_path: Path, threshold=0.8) -> bool:
+    """Detect if a folder is already well-organized"""
+    try:
+        return _folder_stats(str(folder_path), {}, None, follow_links=False).is_organized(threshold)
     except Exception:
         return False
 
-def scan_directory(directory_path, max_files=None, progress_callback=None):
-    """Scan directory and return file metadata"""
+def _snippet_for(item):
+    """Read the content snippet for a (path string, size) pair from scan_directory"""
+    filepath, size = item
+    # Skip very large files (>100MB) for content reading
+    if size >= 100 * 1024 * 1024:
+        return "[File too large]"
+    return read_content_snippet(filepath, size=size)
+
+def scan_directory(directory_path, max_files=None, progress_callback=None, tree=None):
+    """Scan directory and return file metadata (tree: tree_stats result to reuse)"""
     summary = []
     root_path = Path(directory_path).resolve()
     
-    # Get all files first (for progress bar)
-    all_files = []
-    for root, dirs, files in os.walk(root_path):
-        # Remove folders to skip from dirs in-place
-        dirs[:] = [d for d in dirs if d not in SKIP_FOLDERS]
-        
-        root_p = Path(root)
-        if should_skip_path(root_p):
-            continue
-            
-        for f in files:
-            filepath = root_p / f
-            if not should_skip_path(filepath):
-                all_files.append(filepath)
-    
-    print(f"🔍 Found {len(all_files)} files to scan")
-    
-    # Check for organized folders
+    # Check for organized folders first, so the file walk can skip them entirely
     organized_folders = set()
-    for folder in root_path.rglob("*/"):
-        if is_organized_folder(folder):
+    folders, _ = tree if tree is not None else tree_stats(root_path)
+    for folder, stats in folders.items():
+        if stats.is_organized():
             organized_folders.add(folder)
-            print(f"📁 Detected organized folder: {folder.relative_to(root_path)}")
+            print(f"📁 Detected organized folder: {Path(folder).relative_to(root_path)}")
+    
+    # Get all files first (for progress bar), keeping the stat from the listing
+    all_files = walk_files(root_path, prune=organized_folders)
+    
+    print(f"🔍 Found {len(all_files)} files to scan")
     
     # Scan files
+    from tqdm import tqdm  # Imported here so commands that never scan start faster
     files_to_scan = all_files[:max_files] if max_files else all_files
-    for i, filepath in enumerate(tqdm(files_to_scan, 
-                                     desc="Scanning files", 
-                                     disable=progress_callback is not None)):
-        
-        # Skip files in organized folders
-        if any(org_folder in filepath.parents for org_folder in organized_folders):
-            continue
+    
+    # Paths are relative by string slicing (files in organized folders were
+    # never listed, so there is nothing left to filter here)
+    root_prefix = os.path.join(str(root_path), "")
+    pending = []  # (file_info, (path, size)) waiting for a snippet
+    
+    for path_str, stat in files_to_scan:
+        folder = os.path.dirname(path_str)
+        name = path_str[len(folder) + 1:]
             
         try:
-            stat = filepath.stat()
-            
-            # Skip very large files (>100MB) for content reading
-            read_content = stat.st_size < 100 * 1024 * 1024
+            if stat is None:
+                stat = os.stat(path_str)
+            relative_path = path_str[len(root_prefix):]
             
             file_info = {
-                "name": filepath.name,
-                "relative_path": str(filepath.relative_to(root_path)),
-                "path": str(filepath),
-                "extension": filepath.suffix.lower(),
+                "name": name,
+                "relative_path": relative_path,
+                "path": path_str,
+                "extension": _split_suffix(name)[1].lower(),
                 "size_kb": round(stat.st_size / 1024, 2),
-                "created": format_timestamp(stat.st_ctime),
-                "modified": format_timestamp(stat.st_mtime),
-                "accessed": format_timestamp(stat.st_atime),
-                "directory": filepath.parent.name,
-                "depth": get_depth(root_path, filepath.parent),
-                "content_snippet": read_content_snippet(filepath) if read_content else "[File too large]"
+                "created": format_timestamp(int(stat.st_ctime)),
+                "modified": format_timestamp(int(stat.st_mtime)),
+                "accessed": format_timestamp(int(stat.st_atime)),
+                "directory": os.path.basename(folder),
+                "depth": relative_path.count(os.sep),
             }
-            
-            summary.append(file_info)
-            
-            if progress_callback:
-                progress_callback(file_info)
+            pending.append((file_info, (path_str, stat.st_size)))
                 
         except Exception as e:
-            print(f"⚠️ Error scanning {filepath.name}: {e}")
+            print(f"⚠️ Error scanning {name}: {e}")
+    
+    # Snippets are read once the metadata pass is done, so the progress bar
+    # tracks the slow part (file contents)
+    for file_info, item in tqdm(pending, desc="Scanning files", disable=progress_callback is not None):
+        file_info["content_snippet"] = _snippet_for(item)
+        summary.append(file_info)
+        
+        if progress_callback:
+            progress_callback(file_info)
     
     return summary
 
@@ -231,8 +476,8 @@ def summarize_files_for_llm(files, max_snippet_chars=200):
         for f in files
     ]
 
-def analyze_folder_structure(scan_path):
-    """Analyze existing folder structure to preserve organized areas"""
+def analyze_folder_structure(scan_path, tree=None):
+    """Analyze existing folder structure to preserve organized areas (tree: tree_stats result to reuse)"""
     root_path = Path(scan_path).resolve()
     analysis = {
         "total_files": 0,
@@ -241,20 +486,37 @@ def analyze_folder_structure(scan_path):
         "suggestions": []
     }
     
-    for folder in root_path.rglob("*/"):
-        if should_skip_path(folder):
+    # One pass over the tree gives both the folder totals and the files
+    folders, files = tree if tree is not None else tree_stats(root_path)
+    
+    for folder, stats in folders.items():
+        folder = Path(folder)
+        if should_skip_dir(folder):
             continue
             
-        if is_organized_folder(folder):
+        if stats.is_organized():
             rel_path = str(folder.relative_to(root_path))
             analysis["organized_folders"].append(rel_path)
             
-    # Count file types
-    for file in root_path.rglob("*"):
-        if file.is_file() and not should_skip_path(file):
-            analysis["total_files"] += 1
-            ext = file.suffix.lower()
-            analysis["file_types"][ext] = analysis["file_types"].get(ext, 0) + 1
+    # Count file types (the per-folder skip check is done once per folder)
+    skipped_dirs = {}
+    for directory, entry in files:
+        skip_dir = skipped_dirs.get(directory)
+        if skip_dir is None:
+            skip_dir = skipped_dirs[directory] = not SKIP_FOLDERS.isdisjoint(Path(directory).parts)
+        if skip_dir or entry.name.startswith('.') or entry.name in SKIP_FOLDERS:
+            continue
+        
+        suffix = _split_suffix(entry.name)[1]
+        try:
+            if entry.stat().st_size == 0 and suffix not in {'.txt', '.md'}:
+                continue
+        except OSError:
+            continue
+        
+        analysis["total_files"] += 1
+        ext = suffix.lower()
+        analysis["file_types"][ext] = analysis["file_types"].get(ext, 0) + 1
             
     return analysis
 
@@ -266,14 +528,15 @@ if __name__ == "__main__":
 
     folder = sys.argv[1]
     
-    # Analyze structure first
+    # Analyze structure first (the scan right after reuses the same walk)
     print("\n📊 Analyzing folder structure...")
-    analysis = analyze_folder_structure(folder)
+    tree = tree_stats(folder)
+    analysis = analyze_folder_structure(folder, tree=tree)
     print(f"Total files: {analysis['total_files']}")
     print(f"Organized folders found: {len(analysis['organized_folders'])}")
     
     # Scan directory
-    files = scan_directory(folder)
+    files = scan_directory(folder, tree=tree)
     
     # Save results
     output = {
@@ -283,8 +546,7 @@ if __name__ == "__main__":
         "files": files
     }
     
-    with open("data/scan_results.json", "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2)
+    atomic_write("data/scan_results.json", dumps_json(output))
         
     print(f"\n✅ Scan complete! Found {len(files)} files to organize")
     print(f"📄 Results saved to data/scan_results.json")
\ No newline at end of file
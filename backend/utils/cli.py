@@ -4,8 +4,10 @@ Command Line Interface utilities for the File Organizer
 
 import os
 import sys
+import time
 from pathlib import Path
 from datetime import datetime
+from functools import lru_cache
 
 class Colors:
     """ANSI color codes for terminal output"""
@@ -38,6 +40,10 @@ class CLI:
     def __init__(self, use_colors=True):
         if not use_colors or not sys.stdout.isatty():
             Colors.disable()
+        
+        # Built once so per-file progress updates only format the changing part
+        self._progress_prefix = f"\r{Colors.CYAN}⏳ "
+        self._progress_suffix = Colors.ENDC
             
     def header(self, text):
         """Print a header"""
@@ -142,7 +148,7 @@ class CLI:
         """Show a progress message"""
         if current is not None and total is not None:
             percentage = (current / total) * 100 if total > 0 else 0
-            print(f"\r{Colors.CYAN}⏳ {message} [{current}/{total}] {percentage:.1f}%{Colors.ENDC}", 
+            print(f"{self._progress_prefix}{message} [{current}/{total}] {percentage:.1f}%{self._progress_suffix}", 
                   end='', flush=True)
         else:
             print(f"{Colors.CYAN}⏳ {message}...{Colors.ENDC}")
@@ -182,28 +188,40 @@ class CLI:
         """
         print(f"{Colors.HEADER}{banner}{Colors.ENDC}")
 
+def throttled_progress(iterable, total=None, desc="Progress", interval=0.2):
+    """Yield items from an iterable, redrawing a progress line at most every interval seconds"""
+    last = time.monotonic()
+    done = 0
+    for done, item in enumerate(iterable, 1):
+        yield item
+        now = time.monotonic()
+        if now - last >= interval:
+            last = now
+            print(f"\r⏳ {desc}: {done}/{total or '?'}", end='', file=sys.stderr, flush=True)
+    print(f"\r⏳ {desc}: {done}/{total or done}", file=sys.stderr, flush=True)
+
 # Utility functions for quick access
+@lru_cache(maxsize=None)
+def default_cli():
+    """Shared CLI instance for the quick functions below"""
+    return CLI()
+
 def confirm(prompt, default=False):
     """Quick confirm function"""
-    cli = CLI()
-    return cli.confirm(prompt, default)
+    return default_cli().confirm(prompt, default)
 
 def success(message):
     """Quick success message"""
-    cli = CLI()
-    cli.success(message)
+    default_cli().success(message)
 
 def error(message):
     """Quick error message"""
-    cli = CLI()
-    cli.error(message)
+    default_cli().error(message)
 
 def warning(message):
     """Quick warning message"""
-    cli = CLI()
-    cli.warning(message)
+    default_cli().warning(message)
 
 def info(message):
     """Quick info message"""
-    cli = CLI()
-    cli.info(message)
\ No newline at end of file
+    default_cli().info(message)
\ No newline at end of file
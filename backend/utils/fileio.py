@@ -0,0 +1,79 @@
+"""
+File and JSON helpers shared by the backend
+"""
+
+import errno
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the standard library encoder
+    orjson = None
+
+
+def dumps_json(obj, indent=False) -> bytes:
+    """Serialize an object to UTF-8 JSON bytes (uses orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads_json(data):
+    """Parse JSON from bytes or str (uses orjson when installed)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Write buffer for atomic_open; streamed writers (manifest lines, prompt
+# sections) then reach the disk in few large writes
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+@contextmanager
+def atomic_open(path):
+    """Open a temp file for binary writing that replaces path when the block succeeds"""
+    path = Path(path)
+    options = dict(dir=path.parent, prefix=f".{path.name}.", delete=False, buffering=WRITE_BUFFER_SIZE)
+    try:
+        tmp = tempfile.NamedTemporaryFile(**options)
+    except FileNotFoundError:
+        # Only create the folder when it is actually missing
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = tempfile.NamedTemporaryFile(**options)
+    try:
+        with tmp:
+            yield tmp
+        os.replace(tmp.name, path)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+
+
+def atomic_write(path, data: bytes):
+    """Write bytes to a file via a temp file and rename, creating parent folders"""
+    with atomic_open(path) as f:
+        f.write(data)
+
+
+def is_empty_dir(path) -> bool:
+    """Check if a folder is empty, stopping at the first entry"""
+    with os.scandir(path) as entries:
+        return next(entries, None) is None
+
+
+def move_path(src, dst):
+    """Move a file or folder with a single rename, copying only across file systems"""
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(str(src), str(dst))
@@ -6,7 +6,6 @@ Orchestrates the complete file organization workflow
 
 import os
 import sys
-import json
 from pathlib import Path
 from datetime import datetime
 import argparse
@@ -14,26 +13,27 @@ import argparse
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from backend.core.scanner import scan_directory, analyze_folder_structure
+from backend.core.scanner import scan_directory, analyze_folder_structure, tree_stats
 from backend.core.prompt_generator import generate_and_send_prompt, generate_konmari_prompt, save_prompt
 from backend.core.organizer import perform_file_moves, load_plan, cleanup_empty_folders
 from backend.core.backup import create_full_backup, revert_organization, list_backups
-from backend.config.settings import Config
-from backend.utils.cli import CLI
+from backend.config.settings import config
+from backend.utils.cli import default_cli
+from backend.utils.fileio import atomic_write, dumps_json
 
 class FileOrganizer:
     """Main orchestrator for the file organization system"""
     
     def __init__(self):
-        self.config = Config()
-        self.cli = CLI()
+        self.config = config
+        self.cli = default_cli()
         self.ensure_directories()
         
     def ensure_directories(self):
-        """Create necessary directories"""
-        os.makedirs("data", exist_ok=True)
-        os.makedirs("data/backup_archives", exist_ok=True)
-        os.makedirs("logs", exist_ok=True)
+        """Create necessary directories (data/backup_archives also creates data)"""
+        for folder in ("data/backup_archives", "logs"):
+            if not os.path.isdir(folder):
+                os.makedirs(folder, exist_ok=True)
         
     def run_full_workflow(self, target_path, auto_mode=False):
         """Run the complete organization workflow"""
@@ -66,8 +66,7 @@ class FileOrganizer:
             "files": files
         }
         
-        with open("data/scan_results.json", "w") as f:
-            json.dump(scan_results, f, indent=2)
+        atomic_write("data/scan_results.json", dumps_json(scan_results))
         
         print(f"✅ Scanned {len(files)} files")
         
@@ -139,7 +138,7 @@ class FileOrganizer:
                 cleanup_empty_folders(target_path)
                 
                 print("\n✨ Organization completed successfully!")
-                print("💾 Backup manifest saved to: data/backup_manifest.json")
+                print("💾 Backup manifest saved to: data/backup_manifest.jsonl")
                 print("🔄 To revert: python backup.py --revert")
                 return True
             else:
@@ -153,8 +152,10 @@ class FileOrganizer:
         """Run only the scanning step"""
         print(f"\n🔍 Scanning directory: {target_path}")
         
-        analysis = analyze_folder_structure(target_path)
-        files = scan_directory(target_path)
+        # Analysis and scan run back to back, so they share one walk of the tree
+        tree = tree_stats(target_path)
+        analysis = analyze_folder_structure(target_path, tree=tree)
+        files = scan_directory(target_path, tree=tree)
         
         # Save results
         results = {
@@ -165,8 +166,7 @@ class FileOrganizer:
         }
         
         output_file = "data/scan_results.json"
-        with open(output_file, "w") as f:
-            json.dump(results, f, indent=2)
+        atomic_write(output_file, dumps_json(results))
             
         print(f"\n✅ Scan complete!")
         print(f"📊 Total files: {len(files)}")
@@ -6,6 +6,8 @@ Run this after reorganizing to fix all imports
 
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 # Import mappings
@@ -81,32 +83,55 @@ REGEX_PATTERNS = [
      'sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))'),
 ]
 
-def fix_file_imports(file_path, fixes):
-    """Fix imports in a specific file"""
+# Patterns work on the raw file bytes, so files are never decoded and re-encoded
+COMPILED_PATTERNS = [(re.compile(pattern.encode()), replacement.encode()) for pattern, replacement in REGEX_PATTERNS]
+
+@lru_cache(maxsize=None)
+def compile_fixes(fixes):
+    """One pattern matching any old import (longest first, so the most specific wins) and the old -> new mapping"""
+    # Fixes that leave the import unchanged are dropped, so every match is a real change
+    mapping = {old.encode(): new.encode() for old, new in fixes if old != new}
+    if not mapping:
+        return None, mapping
+    pattern = re.compile(b"|".join(re.escape(old) for old in sorted(mapping, key=len, reverse=True)))
+    return pattern, mapping
+
+def rewrite_imports(file_path, fixes):
+    """Apply import fixes to a file, returning True if it changed (None if it is missing)"""
     try:
-        with open(file_path, 'r') as f:
+        with open(file_path, 'rb') as f:
             content = f.read()
-        
-        original = content
-        
-        # Apply specific fixes
-        for old, new in fixes:
-            content = content.replace(old, new)
-        
-        # Apply regex patterns
-        for pattern, replacement in REGEX_PATTERNS:
-            content = re.sub(pattern, replacement, content)
-        
-        # Write back if changed
-        if content != original:
-            with open(file_path, 'w') as f:
-                f.write(content)
-            print(f"✅ Fixed imports in {file_path}")
-            return True
-        return False
     except FileNotFoundError:
+        return None
+    
+    # Apply specific fixes in a single pass, counting replacements
+    changes = 0
+    fix_pattern, mapping = compile_fixes(tuple(fixes))
+    if fix_pattern:
+        content, changes = fix_pattern.subn(lambda m: mapping[m.group(0)], content)
+    
+    # Apply regex patterns
+    for pattern, replacement in COMPILED_PATTERNS:
+        content, count = pattern.subn(replacement, content)
+        changes += count
+    
+    # Write back if changed
+    if changes:
+        with open(file_path, 'wb') as f:
+            f.write(content)
+    return changes > 0
+
+def report_fix(file_path, changed):
+    """Print the outcome of fixing one file"""
+    if changed is None:
         print(f"⚠️  File not found: {file_path}")
-        return False
+    elif changed:
+        print(f"✅ Fixed imports in {file_path}")
+    return bool(changed)
+
+def fix_file_imports(file_path, fixes):
+    """Fix imports in a specific file"""
+    return report_fix(file_path, rewrite_imports(file_path, fixes))
 
 def add_path_setup_to_tests():
     """Add path setup to test files for easier imports"""
@@ -118,12 +143,12 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
     
     for test_file in ['tests/test_api.py', 'tests/test_components.py']:
         if Path(test_file).exists():
-            with open(test_file, 'r') as f:
+            with open(test_file, 'rb') as f:
                 content = f.read()
             
-            if 'sys.path.insert' not in content:
-                with open(test_file, 'w') as f:
-                    f.write(test_path_setup + content)
+            if b'sys.path.insert' not in content:
+                with open(test_file, 'wb') as f:
+                    f.write(test_path_setup.encode() + content)
                 print(f"✅ Added path setup to {test_file}")
 
 def create_backend_config_init():
@@ -146,11 +171,11 @@ def main():
     """Run all import fixes"""
     print("🔧 Fixing imports in reorganized project...")
     
-    # Fix imports in each file
-    fixed_count = 0
-    for file_path, fixes in IMPORT_FIXES.items():
-        if fix_file_imports(file_path, fixes):
-            fixed_count += 1
+    # Fix imports in each file (files are independent, so they are rewritten
+    # in parallel; results are reported here in order)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = executor.map(rewrite_imports, IMPORT_FIXES.keys(), IMPORT_FIXES.values())
+        fixed_count = sum(report_fix(file_path, changed) for file_path, changed in zip(IMPORT_FIXES, results))
     
     # Add path setup to tests
     add_path_setup_to_tests()
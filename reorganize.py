@@ -5,6 +5,7 @@ Reorganize the file-organizer project structure
 
 import os
 import shutil
+from functools import lru_cache
 from pathlib import Path
 import re
 
@@ -23,12 +24,14 @@ def create_directories():
     ]
     
     for directory in directories:
-        Path(directory).mkdir(parents=True, exist_ok=True)
-        # Create __init__.py files for Python packages
+        os.makedirs(directory, exist_ok=True)
+        # Create __init__.py files for Python packages (O_EXCL leaves existing ones alone)
         if directory.startswith("backend") or directory == "tests":
-            init_file = Path(directory) / "__init__.py"
-            if not init_file.exists():
-                init_file.touch()
+            try:
+                os.close(os.open(os.path.join(directory, "__init__.py"),
+                                 os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+            except FileExistsError:
+                pass
 
 def move_files():
     """Move files to their new locations"""
@@ -64,27 +67,34 @@ def move_files():
             print(f"Moving {old_path} -> {new_path}")
             shutil.move(old_path, new_path)
 
+@lru_cache(maxsize=None)
+def compile_import_map(import_items):
+    """One pattern matching 'from <old> import' or 'import <old>' for any mapped module"""
+    mapping = {old.encode(): new.encode() for old, new in import_items if old != new}
+    modules = b"|".join(re.escape(old) for old in sorted(mapping, key=len, reverse=True))
+    pattern = re.compile(rb"\bfrom (" + modules + rb") import|\bimport (" + modules + rb")\b")
+    return pattern, mapping
+
 def update_imports_in_file(file_path, import_map):
     """Update imports in a single file"""
-    with open(file_path, 'r') as f:
+    pattern, mapping = compile_import_map(tuple(import_map.items()))
+    if not mapping:
+        return
+    
+    with open(file_path, 'rb') as f:
         content = f.read()
     
-    original_content = content
+    # Update both import styles in one pass
+    def replace(match):
+        if match.group(1):
+            return b"from " + mapping[match.group(1)] + b" import"
+        return b"import " + mapping[match.group(2)]
     
-    # Update imports
-    for old_import, new_import in import_map.items():
-        # Handle different import styles
-        patterns = [
-            (rf'from {old_import} import', f'from {new_import} import'),
-            (rf'import {old_import}', f'import {new_import}'),
-        ]
-        
-        for old_pattern, new_pattern in patterns:
-            content = re.sub(old_pattern, new_pattern, content)
+    content, changes = pattern.subn(replace, content)
     
     # Only write if content changed
-    if content != original_content:
-        with open(file_path, 'w') as f:
+    if changes:
+        with open(file_path, 'wb') as f:
             f.write(content)
         print(f"✅ Updated imports in {file_path}")
 
@@ -4,68 +4,85 @@ Create a test folder structure for testing the file organizer
 """
 
 import os
+import shutil
+import sys
 from pathlib import Path
 import random
 import datetime
 
+# Test files as (path, content bytes), encoded once at import
+TEST_FILES = tuple((path, content.encode("utf-8")) for path, content in {
+    # Documents
+    "test_folder/resume_2024.txt": "John Doe\nSoftware Engineer\nExperience: 5 years",
+    "test_folder/cover_letter.txt": "Dear Hiring Manager,\nI am applying for...",
+    "test_folder/invoice_jan2024.txt": "Invoice #1234\nAmount: $500",
+    "test_folder/meeting_notes.txt": "Meeting notes from Jan 15, 2024",
+    
+    # Code files
+    "test_folder/script.py": "import os\nprint('Hello World')",
+    "test_folder/index.html": "<html><body><h1>Test</h1></body></html>",
+    "test_folder/style.css": "body { margin: 0; padding: 0; }",
+    
+    # Personal files
+    "test_folder/vacation_plans.txt": "Trip to Hawaii - June 2024",
+    "test_folder/shopping_list.txt": "Milk, Bread, Eggs",
+    
+    # Nested folders
+    "test_folder/downloads/setup.txt": "[This would be a setup file]",
+    "test_folder/downloads/manual.txt": "User Manual v1.0",
+    "test_folder/old_files/report_2020.txt": "Annual Report 2020",
+    "test_folder/old_files/backup_2019.txt": "Backup data from 2019",
+    
+    # Project folder (should be preserved)
+    "test_folder/my_project/README.md": "# My Project\nThis is a test project",
+    "test_folder/my_project/main.py": "def main():\n    pass",
+    "test_folder/my_project/requirements.txt": "fastapi\nuvicorn",
+    "test_folder/my_project/.gitignore": "*.pyc\n__pycache__",
+    
+    # Random files
+    "test_folder/random_note.txt": "Remember to call mom",
+    "test_folder/todo_list.txt": "1. Finish project\n2. Clean room",
+}.items())
+
 def create_test_folder():
     """Create a test folder with various file types"""
     test_dir = Path("test_folder")
     
-    # Remove existing test folder if it exists
-    if test_dir.exists():
-        import shutil
+    # Remove existing test folder (if any) without checking first; other failures still raise
+    try:
         shutil.rmtree(test_dir)
+    except FileNotFoundError:
+        pass
     
     print("🏗️  Creating test folder structure...")
     
-    # Create test files
-    test_files = {
-        # Documents
-        "test_folder/resume_2024.txt": "John Doe\nSoftware Engineer\nExperience: 5 years",
-        "test_folder/cover_letter.txt": "Dear Hiring Manager,\nI am applying for...",
-        "test_folder/invoice_jan2024.txt": "Invoice #1234\nAmount: $500",
-        "test_folder/meeting_notes.txt": "Meeting notes from Jan 15, 2024",
-        
-        # Code files
-        "test_folder/script.py": "import os\nprint('Hello World')",
-        "test_folder/index.html": "<html><body><h1>Test</h1></body></html>",
-        "test_folder/style.css": "body { margin: 0; padding: 0; }",
-        
-        # Personal files
-        "test_folder/vacation_plans.txt": "Trip to Hawaii - June 2024",
-        "test_folder/shopping_list.txt": "Milk, Bread, Eggs",
-        
-        # Nested folders
-        "test_folder/downloads/setup.txt": "[This would be a setup file]",
-        "test_folder/downloads/manual.txt": "User Manual v1.0",
-        "test_folder/old_files/report_2020.txt": "Annual Report 2020",
-        "test_folder/old_files/backup_2019.txt": "Backup data from 2019",
-        
-        # Project folder (should be preserved)
-        "test_folder/my_project/README.md": "# My Project\nThis is a test project",
-        "test_folder/my_project/main.py": "def main():\n    pass",
-        "test_folder/my_project/requirements.txt": "fastapi\nuvicorn",
-        "test_folder/my_project/.gitignore": "*.pyc\n__pycache__",
-        
-        # Random files
-        "test_folder/random_note.txt": "Remember to call mom",
-        "test_folder/todo_list.txt": "1. Finish project\n2. Clean room",
-    }
+    # Create each folder once, then the files
+    for folder in dict.fromkeys(os.path.dirname(file_path) for file_path, _ in TEST_FILES):
+        os.makedirs(folder, exist_ok=True)
     
-    # Create files
     created_count = 0
-    for file_path, content in test_files.items():
-        path = Path(file_path)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(content)
+    created_lines = []
+    for file_path, data in TEST_FILES:
+        # Plain string paths: each one goes straight to a system call
+        with open(file_path, "wb") as f:
+            f.write(data)
         created_count += 1
-        print(f"✅ Created: {file_path}")
+        created_lines.append(f"✅ Created: {file_path}\n")
+    
+    # List the files in one write
+    sys.stdout.write("".join(created_lines))
     
-    # Create some empty files
-    for i in range(5):
-        empty_file = test_dir / f"empty_file_{i}.txt"
-        empty_file.touch()
+    # Create some empty files (hard links to one empty inode where supported)
+    first_empty = os.path.join(test_dir, "empty_file_0.txt")
+    os.close(os.open(first_empty, os.O_CREAT | os.O_WRONLY, 0o644))
+    created_count += 1
+    for i in range(1, 5):
+        empty_file = os.path.join(test_dir, f"empty_file_{i}.txt")
+        try:
+            os.link(first_empty, empty_file)
+        except OSError:
+            # File systems without hard links (e.g. FAT32); a plain create skips touch()'s utime
+            os.close(os.open(empty_file, os.O_CREAT | os.O_WRONLY, 0o644))
         created_count += 1
     
     print(f"\n✨ Created test folder with {created_count} files")
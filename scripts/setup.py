@@ -4,11 +4,30 @@ Setup script for File Organizer
 Creates necessary directories and validates environment
 """
 
+import importlib.util
 import os
 import sys
 import subprocess
 from pathlib import Path
 
+INTERACTIVE = sys.stdin.isatty()  # Without a terminal (e.g. CI) prompts take their defaults
+
+def ask(question, default, env_var):
+    """Ask a yes/no question, answered by env_var or the default when not interactive"""
+    answer = os.getenv(env_var)
+    if answer is None:
+        if not INTERACTIVE:
+            return default
+        answer = input(question)
+    answer = answer.strip().lower()
+    if default:
+        return answer not in ("n", "no", "0", "false")
+    return answer in ("y", "yes", "1", "true")
+
+def is_installed(package):
+    """Check if a package can be imported, without running its import code"""
+    return importlib.util.find_spec(package) is not None
+
 def create_directories():
     """Create necessary directory structure"""
     directories = [
@@ -33,7 +52,9 @@ def check_dependencies():
     optional_packages = {
         "openai": "OpenAI API support",
         "colorama": "Colored terminal output",
-        "magic": "File type detection"
+        "magic": "File type detection",
+        "orjson": "Faster JSON encoding",
+        "blake3": "Faster file hashing"
     }
     
     missing_required = []
@@ -43,19 +64,17 @@ def check_dependencies():
     
     # Check required packages
     for package, description in required_packages.items():
-        try:
-            __import__(package)
+        if is_installed(package):
             print(f"✅ {package} - {description}")
-        except ImportError:
+        else:
             missing_required.append(package)
             print(f"❌ {package} - {description} (REQUIRED)")
     
     # Check optional packages
     for package, description in optional_packages.items():
-        try:
-            __import__(package)
+        if is_installed(package):
             print(f"✅ {package} - {description}")
-        except ImportError:
+        else:
             missing_optional.append(package)
             print(f"⚠️  {package} - {description} (optional)")
     
@@ -68,14 +87,18 @@ def install_dependencies(packages):
         
     print(f"\n📦 Installing {len(packages)} packages...")
     
-    try:
-        subprocess.check_call([
-            sys.executable, "-m", "pip", "install", "-r", "requirements.txt"
-        ])
-        return True
-    except subprocess.CalledProcessError:
+    # pip's log is only shown when the install fails
+    result = subprocess.run([
+        sys.executable, "-m", "pip", "install", "-q", "--no-input", "--disable-pip-version-check",
+        "-r", "requirements.txt"
+    ], capture_output=True, text=True)
+    if result.returncode:
+        print(result.stdout, end="")
+        print(result.stderr, end="", file=sys.stderr)
         print("❌ Failed to install dependencies")
         return False
+    
+    return True
 
 def check_api_key():
     """Check if OpenAI API key is configured"""
@@ -89,40 +112,41 @@ def check_api_key():
         print("   To set: export OPENAI_API_KEY='your-key-here'")
         return False
 
+# Test structure as (path, content bytes), encoded once at import
+TEST_FILES = tuple((path, content.encode("utf-8")) for path, content in {
+    "test_folder/resume_2024.pdf": "Resume content",
+    "test_folder/invoice_january.pdf": "Invoice content",
+    "test_folder/vacation_photo.jpg": "",
+    "test_folder/project_notes.txt": "Project planning notes",
+    "test_folder/downloads/setup.exe": "",
+    "test_folder/downloads/manual.pdf": "User manual",
+    "test_folder/code/script.py": "import os\nprint('Hello')",
+    "test_folder/code/index.html": "<html><body>Test</body></html>",
+    "test_folder/old_files/report_2020.doc": "Old report",
+    "test_folder/old_files/backup_2019.zip": "",
+}.items())
+
 def create_test_structure():
     """Create a test folder structure for testing"""
     test_dir = Path("test_folder")
     
-    if test_dir.exists():
+    # Creating the folder doubles as the existence check
+    try:
+        test_dir.mkdir()
+    except FileExistsError:
         print(f"\n⚠️  Test folder already exists: {test_dir}")
         return
     
     print(f"\n🏗️  Creating test folder structure...")
     
-    # Create test structure
-    test_files = {
-        "test_folder/resume_2024.pdf": "Resume content",
-        "test_folder/invoice_january.pdf": "Invoice content",
-        "test_folder/vacation_photo.jpg": "",
-        "test_folder/project_notes.txt": "Project planning notes",
-        "test_folder/downloads/setup.exe": "",
-        "test_folder/downloads/manual.pdf": "User manual",
-        "test_folder/code/script.py": "import os\nprint('Hello')",
-        "test_folder/code/index.html": "<html><body>Test</body></html>",
-        "test_folder/old_files/report_2020.doc": "Old report",
-        "test_folder/old_files/backup_2019.zip": "",
-    }
+    # Create each folder once, then the files (empty content makes an empty file)
+    for folder in dict.fromkeys(Path(file_path).parent for file_path, _ in TEST_FILES):
+        folder.mkdir(parents=True, exist_ok=True)
     
-    for file_path, content in test_files.items():
-        path = Path(file_path)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        
-        if content:
-            path.write_text(content)
-        else:
-            path.touch()
+    for file_path, data in TEST_FILES:
+        Path(file_path).write_bytes(data)
     
-    print(f"✅ Created test folder with {len(test_files)} files")
+    print(f"✅ Created test folder with {len(TEST_FILES)} files")
     print(f"   Test with: python main.py test_folder")
 
 def main():
@@ -139,9 +163,7 @@ def main():
     
     if missing_required:
         print(f"\n❌ Missing required dependencies: {', '.join(missing_required)}")
-        response = input("\nInstall missing dependencies? [Y/n]: ").strip().lower()
-        
-        if response != 'n':
+        if ask("\nInstall missing dependencies? [Y/n]: ", True, "FILEORG_INSTALL_DEPS"):
             success = install_dependencies(missing_required)
             if not success:
                 print("\n❌ Setup failed. Please install dependencies manually:")
@@ -153,8 +175,7 @@ def main():
     check_api_key()
     
     # 4. Create test structure
-    response = input("\n📁 Create test folder for testing? [y/N]: ").strip().lower()
-    if response == 'y':
+    if ask("\n📁 Create test folder for testing? [y/N]: ", False, "FILEORG_CREATE_TEST_FOLDER"):
         create_test_structure()
     
     # 5. Final message
@@ -164,6 +185,7 @@ def main():
     print("1. Run: python main.py /path/to/folder")
     print("2. Or test with: python main.py test_folder")
     print("\nFor help: python main.py --help")
+    print("Unattended setup: set FILEORG_INSTALL_DEPS and FILEORG_CREATE_TEST_FOLDER to y/n")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -15,10 +15,36 @@ from pathlib import Path
 
 API_BASE = "http://localhost:8765"
 
+# One keep-alive session so the tests reuse connections instead of opening one per request
+session = requests.Session()
+session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+def wait_for_task(task_id, timeout=None):
+    """Follow a task's event stream until it finishes, returning the final task (None on timeout)"""
+    deadline = time.monotonic() + timeout if timeout else None
+    time.sleep(0.05)  # Give the background task a moment to register
+    
+    try:
+        with session.get(f"{API_BASE}/api/events/{task_id}", stream=True, timeout=(2, timeout)) as response:
+            for line in response.iter_lines():
+                if deadline and time.monotonic() > deadline:
+                    return None
+                if not line.startswith(b"data: "):
+                    continue  # Keep-alive comments
+                
+                task = json.loads(line[6:])
+                print(f"   Status: {task['status']} - Progress: {task['progress']*100:.1f}% - {task['message']}")
+                
+                if task["status"] in ["completed", "failed"]:
+                    return task
+    except requests.exceptions.Timeout:
+        pass
+    return None
+
 def test_health():
     """Test API health endpoint"""
     print("🏥 Testing health endpoint...")
-    response = requests.get(f"{API_BASE}/")
+    response = session.get(f"{API_BASE}/")
     
     print(f"Status: {response.status_code}")
     print(f"Raw response: {response.text}")
@@ -31,7 +57,7 @@ def test_scan(path):
     print(f"🔍 Testing scan endpoint with path: {path}")
     
     # Start scan
-    response = requests.post(f"{API_BASE}/api/scan", json={
+    response = session.post(f"{API_BASE}/api/scan", json={
         "path": path,
         "max_files": 100
     })
@@ -44,40 +70,26 @@ def test_scan(path):
     task_id = data["task_id"]
     print(f"✅ Scan started with task_id: {task_id}")
     
-    # Poll for completion
+    # Wait for completion
     print("⏳ Waiting for scan to complete...")
-    max_attempts = 30  # 30 seconds max
-    attempt = 0
+    task = wait_for_task(task_id, timeout=30)  # 30 seconds max
     
-    while attempt < max_attempts:
-        response = requests.get(f"{API_BASE}/api/task/{task_id}")
-        
-        if response.status_code != 200:
-            print(f"❌ Failed to get task status: {response.text}")
-            return None
-            
-        task = response.json()
-        
-        print(f"   Status: {task['status']} - Progress: {task['progress']*100:.1f}% - {task['message']}")
-        
-        if task["status"] == "completed":
-            print(f"✅ Scan completed! Found {task['result']['total_files']} files")
-            return task_id
-        elif task["status"] == "failed":
-            print(f"❌ Scan failed: {task['error']}")
-            return None
-            
-        time.sleep(1)
-        attempt += 1
+    if task is None:
+        print("❌ Scan timed out")
+        return None
     
-    print("❌ Scan timed out")
+    if task["status"] == "completed":
+        print(f"✅ Scan completed! Found {task['result']['total_files']} files")
+        return task_id
+    
+    print(f"❌ Scan failed: {task['error']}")
     return None
 
 def test_prompt_generation(path):
     """Test prompt generation"""
     print(f"📝 Testing prompt generation...")
     
-    response = requests.post(f"{API_BASE}/api/prompt", json={
+    response = session.post(f"{API_BASE}/api/prompt", json={
         "path": path,
         "use_cached_scan": True
     })
@@ -90,23 +102,21 @@ def test_prompt_generation(path):
     task_id = data["task_id"]
     print(f"✅ Prompt generation started with task_id: {task_id}")
     
-    # Poll for completion
+    # Wait for completion
     print("⏳ Waiting for prompt generation...")
-    while True:
-        response = requests.get(f"{API_BASE}/api/task/{task_id}")
-        task = response.json()
-        
-        print(f"   Status: {task['status']} - Progress: {task['progress']*100:.1f}%")
-        
-        if task["status"] == "completed":
-            print(f"✅ Prompt generated! Length: {task['result']['prompt_length']} chars")
-            print(f"   Saved to: {task['result']['prompt_file']}")
-            return True
-        elif task["status"] == "failed":
-            print(f"❌ Prompt generation failed: {task['error']}")
-            return False
-            
-        time.sleep(1)
+    task = wait_for_task(task_id)
+    
+    if task is None:
+        print("❌ Prompt generation timed out")
+        return False
+    
+    if task["status"] == "completed":
+        print(f"✅ Prompt generated! Length: {task['result']['prompt_length']} chars")
+        print(f"   Saved to: {task['result']['prompt_file']}")
+        return True
+    
+    print(f"❌ Prompt generation failed: {task['error']}")
+    return False
 
 def test_plan_validation():
     """Test plan validation"""
@@ -125,7 +135,7 @@ def test_plan_validation():
         ]
     }
     
-    response = requests.post(f"{API_BASE}/api/plan/validate", json={
+    response = session.post(f"{API_BASE}/api/plan/validate", json={
         "path": ".",
         "plan": test_plan
     })
@@ -142,7 +152,7 @@ def test_config():
     """Test configuration endpoint"""
     print("⚙️  Testing configuration endpoint...")
     
-    response = requests.get(f"{API_BASE}/api/config")
+    response = session.get(f"{API_BASE}/api/config")
     if response.status_code == 200:
         config = response.json()
         print(f"✅ Configuration loaded:")
@@ -158,25 +168,27 @@ def test_sse_events():
     print("   (Start a scan in another terminal to see events)")
     print("   Press Ctrl+C to stop\n")
     
-    # Get the latest task
-    response = requests.get(f"{API_BASE}/api/tasks")
-    tasks = response.json()["tasks"]
-    
-    if not tasks:
-        print("❌ No tasks found. Run a scan first.")
-        return
-        
-    latest_task = tasks[-1]
-    task_id = latest_task["task_id"]
-    
-    print(f"Monitoring task: {task_id}")
-    
     try:
-        # Stream events
-        response = requests.get(f"{API_BASE}/api/events/{task_id}", stream=True)
+        # Follow the newest task directly; older servers need the task list first
+        response = session.get(f"{API_BASE}/api/events/latest", stream=True)
+        if response.status_code == 404:
+            response.close()
+            tasks = session.get(f"{API_BASE}/api/tasks").json()["tasks"]
+            
+            if not tasks:
+                print("❌ No tasks found. Run a scan first.")
+                return
+            
+            task_id = tasks[-1]["task_id"]
+            response = session.get(f"{API_BASE}/api/events/{task_id}", stream=True)
+        else:
+            task_id = response.headers.get("X-Task-ID", "latest")
+        
+        print(f"Monitoring task: {task_id}")
         
-        for line in response.iter_lines():
-            if line:
+        # Stream events
+        with response:
+            for line in response.iter_lines(chunk_size=8192):
                 if line.startswith(b"data: "):
                     data = json.loads(line[6:])
                     print(f"📨 Event: {data['status']} - {data['progress']*100:.1f}% - {data['message']}")
@@ -195,7 +207,7 @@ def main():
     
     # Check if API is running
     try:
-        requests.get(f"{API_BASE}/", timeout=2)
+        session.get(f"{API_BASE}/", timeout=2)
     except requests.exceptions.ConnectionError:
         print("❌ API is not running!")
         print("   Start it with: python api.py")
@@ -10,14 +10,46 @@ Run this to test individual modules
 
 import os
 import sys
-import json
 from pathlib import Path
-import tempfile
-import shutil
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+# Files in the shared test folder as (relative path, content)
+FIXTURE_FILES = [
+    ("test.txt", b"Hello World"),
+    ("test.pdf", b""),
+    ("subdir/test2.py", b"print('test')"),
+]
+
+_fixture = None
+
+def fixture_folder():
+    """Create the test folder shared by the read-only tests once, returning its path"""
+    global _fixture
+    if _fixture is None:
+        import tempfile
+        _fixture = tempfile.TemporaryDirectory()
+        
+        # The temp folder is fresh, so nothing needs truncating
+        for parent in {os.path.dirname(rel) for rel, _ in FIXTURE_FILES} - {""}:
+            os.makedirs(os.path.join(_fixture.name, parent))
+        for rel, data in FIXTURE_FILES:
+            fd = os.open(os.path.join(_fixture.name, rel), os.O_CREAT | os.O_WRONLY, 0o644)
+            try:
+                if data:
+                    os.write(fd, data)
+            finally:
+                os.close(fd)
+    return _fixture.name
+
+def remove_fixture_folder():
+    """Remove the shared test folder if it was created"""
+    global _fixture
+    if _fixture is not None:
+        _fixture.cleanup()
+        _fixture = None
+
 def test_scanner():
     """Test the scanner module"""
     print("\n🔍 Testing Scanner Module...")
@@ -25,24 +57,59 @@ def test_scanner():
     try:
         from backend.core.scanner import scan_directory, analyze_folder_structure
         
-        # Create a temporary test directory
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Create test files
-            (Path(temp_dir) / "test.txt").write_text("Hello World")
-            (Path(temp_dir) / "test.pdf").touch()
-            (Path(temp_dir) / "subdir").mkdir()
-            (Path(temp_dir) / "subdir" / "test2.py").write_text("print('test')")
-            
-            # Test scanning
-            files = scan_directory(temp_dir)
-            print(f"✅ Scanned {len(files)} files")
-            
-            # Test analysis
-            analysis = analyze_folder_structure(temp_dir)
-            print(f"✅ Analysis complete: {analysis['total_files']} total files")
-            
-            return True
+        # Scanning only reads, so the shared test folder is used
+        temp_dir = fixture_folder()
+        
+        # Test scanning
+        files = scan_directory(temp_dir)
+        print(f"✅ Scanned {len(files)} files")
+        
+        # Test analysis
+        analysis = analyze_folder_structure(temp_dir)
+        print(f"✅ Analysis complete: {analysis['total_files']} total files")
+        
+        # Repeated analyses see files added in between
+        import tempfile
+        with tempfile.TemporaryDirectory() as fresh_dir:
+            (Path(fresh_dir) / "first.txt").write_text("one")
+            before = analyze_folder_structure(fresh_dir)["total_files"]
+            (Path(fresh_dir) / "second.txt").write_text("two")
+            after = analyze_folder_structure(fresh_dir)["total_files"]
+            print(f"✅ Re-analysis after adding a file: {before} → {after} files")
+            if (before, after) != (1, 2):
+                return False
+        
+        # Symlinks inside a symlinked folder are not followed, so a loop ends
+        from backend.core.scanner import tree_stats
+        with tempfile.TemporaryDirectory() as loop_dir:
+            os.makedirs(os.path.join(loop_dir, "a"))
+            os.symlink("..", os.path.join(loop_dir, "a", "up"))
+            os.symlink(".", os.path.join(loop_dir, "a", "self"))
+            folders, _ = tree_stats(loop_dir)
+            print(f"✅ Symlink loop walked: {len(folders)} folders")
+            if len(folders) != 3:
+                return False
+        
+        # The walk keeps its own stack, so nesting deeper than the recursion limit works
+        with tempfile.TemporaryDirectory() as deep_dir:
+            folder = deep_dir
+            for _ in range(sys.getrecursionlimit() + 100):
+                folder = os.path.join(folder, "d")
+                os.mkdir(folder)
+            Path(folder, "deep.txt").write_text("deep")
+            folders, files = tree_stats(deep_dir)
+            print(f"✅ Deep tree walked: {len(folders)} folders")
             
+            # Removed bottom-up here, as rmtree recurses
+            os.remove(os.path.join(folder, "deep.txt"))
+            while folder != deep_dir:
+                os.rmdir(folder)
+                folder = os.path.dirname(folder)
+            if len(files) != 1:
+                return False
+        
+        return True
+        
     except Exception as e:
         print(f"❌ Scanner test failed: {e}")
         return False
@@ -53,6 +120,7 @@ def test_prompt_generator():
     
     try:
         from backend.core.prompt_generator import generate_konmari_prompt, save_prompt
+        from backend.utils.fileio import dumps_json
         
         # Create test scan results
         test_results = {
@@ -76,23 +144,61 @@ def test_prompt_generator():
             ]
         }
         
-        # Save test results
-        os.makedirs("data", exist_ok=True)
-        with open("data/scan_results.json", "w") as f:
-            json.dump(test_results, f)
+        # Prompts read and write data/ under the working folder, so the fixture goes
+        # into a scratch one and the real scan results are never replaced
+        import tempfile
+        with tempfile.TemporaryDirectory() as work_dir:
+            cwd = os.getcwd()
+            os.chdir(work_dir)
+            try:
+                # Save test results
+                os.makedirs("data")
+                Path("data/scan_results.json").write_bytes(dumps_json(test_results))
+                
+                # Generate prompt
+                prompt = generate_konmari_prompt("/test", max_files=10)
+                print(f"✅ Generated prompt: {len(prompt)} characters")
+                
+                # Save prompt
+                save_prompt("Test prompt content")
+                print("✅ Saved prompt to file")
+            finally:
+                os.chdir(cwd)
         
-        # Generate prompt
-        prompt = generate_konmari_prompt("/test", max_files=10)
-        print(f"✅ Generated prompt: {len(prompt)} characters")
+        return True
         
-        # Save prompt
-        save_prompt("Test prompt content")
-        print("✅ Saved prompt to file")
+    except Exception as e:
+        print(f"❌ Prompt generator test failed: {e}")
+        return False
+
+def test_snippet_grouping():
+    """Test near-duplicate snippet grouping"""
+    print("\n🧩 Testing Snippet Grouping...")
+    
+    try:
+        from backend.core.prompt_generator import group_near_duplicates, group_similar_snippets
+        
+        # Hashes within 3 bits of a group's first hash join it, wherever the bits differ
+        groups = group_near_duplicates([0, 1 << 63, 0b1111, (1 << 63) | 0b11, 0xFFFF << 32])
+        assert groups == [[0, 1, 3], [2], [4]], groups
+        print("✅ Hashes grouped by Hamming distance")
+        
+        report = "Quarterly sales report covering regional revenue, growth targets and hiring plans"
+        rows = [
+            {"snippet": report},
+            {"snippet": "Packing list for the summer holiday trip to the coast with the whole family"},
+            {"snippet": report},
+            {"snippet": "short"},
+        ]
+        shared = group_similar_snippets(rows)
+        assert shared == [("G1", report)], shared
+        assert [row["snippet"] for row in rows] == ["[same as G1]", rows[1]["snippet"], "[same as G1]", "short"]
+        print("✅ Duplicate snippets grouped, distinct ones kept")
         
         return True
         
     except Exception as e:
-        print(f"❌ Prompt generator test failed: {e}")
+        print(f"❌ Snippet grouping test failed: {e}")
         return False
 
 def test_organizer():
@@ -100,7 +206,7 @@ def test_organizer():
     print("\n🚀 Testing Organizer Module...")
     
     try:
-        from backend.core.organizer import validate_plan, perform_file_moves
+        from backend.core.organizer import validate_plan, perform_file_moves, load_plan
         
         # Create test plan
         test_plan = {
@@ -115,26 +221,126 @@ def test_organizer():
             ]
         }
         
-        # Test validation
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Create test file
-            test_file = Path(temp_dir) / "test.txt"
-            test_file.write_text("Test content")
-            
-            # Validate plan
-            issues = validate_plan(test_plan, temp_dir)
-            print(f"✅ Plan validation: {len(issues)} issues")
-            
-            # Test dry run
-            success = perform_file_moves(temp_dir, test_plan, dry_run=True)
-            print(f"✅ Dry run completed: {success}")
-            
+        # Validation and a dry run leave the folder untouched, so the shared one is used
+        temp_dir = fixture_folder()
+        
+        # Validate plan
+        issues = validate_plan(test_plan, temp_dir)
+        print(f"✅ Plan validation: {len(issues)} issues")
+        
+        # Test dry run
+        success = perform_file_moves(temp_dir, test_plan, dry_run=True)
+        print(f"✅ Dry run completed: {success}")
+        
+        # Loaded plans are copies, so changing one leaves the next load intact
+        import json
+        import tempfile
+        with tempfile.TemporaryDirectory() as plan_dir:
+            plan_file = os.path.join(plan_dir, "plan.json")
+            with open(plan_file, "w") as f:
+                json.dump(test_plan, f)
+            load_plan(plan_file)["moves"].clear()
+            reloaded = load_plan(plan_file)
+            print(f"✅ Plan reloaded after a caller changed its copy: {len(reloaded['moves'])} moves")
+            if reloaded != test_plan:
+                return False
+        
         return True
         
     except Exception as e:
         print(f"❌ Organizer test failed: {e}")
         return False
 
+def test_move_order():
+    """Test that moves depending on each other run in plan order"""
+    print("\n🔗 Testing Move Order...")
+    
+    try:
+        import json
+        import tempfile
+        from backend.core.organizer import perform_file_moves, _group_moves
+        
+        with tempfile.TemporaryDirectory() as temp_dir, tempfile.TemporaryDirectory() as work_dir:
+            # Backup manifests and results are written to data/ under the working
+            # folder, so the moves run from a scratch one and leave the real data/ alone
+            cwd = os.getcwd()
+            os.chdir(work_dir)
+            try:
+                root = Path(temp_dir)
+                (root / "a.txt").write_text("A")
+                (root / "b.txt").write_text("B")
+                (root / "notes.txt").write_text("N")
+                (root / "Projects").mkdir()
+                
+                # b.txt has to move out before a.txt takes its name, and notes.txt has
+                # to reach Projects before the folder itself moves into Archive
+                plan = {
+                    "folders": ["Archive"],
+                    "moves": [
+                        {"file": "b.txt", "new_path": "c.txt", "reason": "Chain"},
+                        {"file": "a.txt", "new_path": "b.txt", "reason": "Chain"},
+                        {"file": "notes.txt", "new_path": "Projects/notes.txt", "reason": "Nested"},
+                        {"file": "Projects", "new_path": "Archive/Projects", "reason": "Nested"},
+                    ]
+                }
+                if not perform_file_moves(temp_dir, plan):
+                    return False
+                if (root / "c.txt").read_text() != "B" or (root / "b.txt").read_text() != "A":
+                    return False
+                print("✅ Chained moves kept their order")
+                if (root / "Archive" / "Projects" / "notes.txt").read_text() != "N":
+                    return False
+                print("✅ Move into a moved folder kept its order")
+                
+                # Destinations naming the same file share a folder group, so the
+                # second one is renamed instead of overwriting the first
+                (root / "x.txt").write_text("X")
+                (root / "y.txt").write_text("Y")
+                plan = {
+                    "folders": ["Docs"],
+                    "moves": [
+                        {"file": "x.txt", "new_path": "Docs/a.txt", "reason": "Same file"},
+                        {"file": "y.txt", "new_path": "Docs/../Docs/a.txt", "reason": "Same file"},
+                    ]
+                }
+                if not perform_file_moves(temp_dir, plan):
+                    return False
+                kept = sorted(path.read_text() for path in (root / "Docs").iterdir())
+                print(f"✅ Same destination written twice kept both files: {kept}")
+                if kept != ["X", "Y"] or len(_group_moves(root, [
+                    {"file": "x.txt", "new_path": "Docs/a.txt"},
+                    {"file": "y.txt", "new_path": "docs/A.txt"},
+                ])) != 1:
+                    return False
+                
+                # Independent moves run in parallel but are reported in plan order. Each
+                # destination folder is a file, so every move fails with its own entry
+                names = [f"file{i}.txt" for i in range(12)]
+                for name in names:
+                    (root / name).write_text(name)
+                    (root / f"Blocked_{name}").write_text("")
+                plan = {
+                    "folders": [],
+                    "moves": [
+                        {"file": name, "new_path": f"Blocked_{name}/{name}", "reason": "Order"}
+                        for name in reversed(names)
+                    ]
+                }
+                perform_file_moves(temp_dir, plan)
+                with open("data/organization_results.json") as f:
+                    failed = [fail["file"] for fail in json.load(f)["failed_moves"]]
+                print(f"✅ Results reported in plan order: {failed == list(reversed(names))}")
+                if failed != list(reversed(names)):
+                    return False
+            finally:
+                os.chdir(cwd)
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Move order test failed: {e}")
+        return False
+
 def test_backup():
     """Test the backup module"""
     print("\n💾 Testing Backup Module...")
@@ -142,38 +348,37 @@ def test_backup():
     try:
         from backend.core.backup import create_backup_manifest, calculate_file_hash, create_full_backup
         
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Create test file
-            test_file = Path(temp_dir) / "test.txt"
-            test_file.write_text("Test content for backup")
-            
-            # Test hash calculation
-            file_hash = calculate_file_hash(test_file)
-            print(f"✅ File hash calculated: {file_hash[:10]}...")
-            
-            # Test manifest creation
-            test_plan = {
-                "folders": ["TestFolder"],
-                "moves": [{
-                    "file": "test.txt",
-                    "relative_path": "test.txt",
-                    "new_path": "TestFolder/test.txt",
-                    "reason": "Test move"
-                }]
-            }
-            
-            os.makedirs("data", exist_ok=True)
-            manifest = create_backup_manifest(temp_dir, test_plan)
-            print(f"✅ Backup manifest created: {len(manifest['original_state'])} files")
-            
-            # Test full backup creation
-            backup_file = create_full_backup(temp_dir, "test_backup")
-            print(f"✅ Full backup created: {backup_file}")
-            
-            # Clean up test backup
-            if Path(backup_file).exists():
-                os.remove(backup_file)
-            
+        # Backups only read the folder (their files go to data/), so the shared one is used
+        temp_dir = fixture_folder()
+        test_file = Path(temp_dir) / "test.txt"
+        
+        # Test hash calculation
+        file_hash = calculate_file_hash(test_file)
+        print(f"✅ File hash calculated: {file_hash[:10]}...")
+        
+        # Test manifest creation
+        test_plan = {
+            "folders": ["TestFolder"],
+            "moves": [{
+                "file": "test.txt",
+                "relative_path": "test.txt",
+                "new_path": "TestFolder/test.txt",
+                "reason": "Test move"
+            }]
+        }
+        
+        os.makedirs("data", exist_ok=True)
+        manifest = create_backup_manifest(temp_dir, test_plan)
+        print(f"✅ Backup manifest created: {len(manifest['original_state'])} files")
+        
+        # Test full backup creation
+        backup_file = create_full_backup(temp_dir, "test_backup")
+        print(f"✅ Full backup created: {backup_file}")
+        
+        # Clean up test backup
+        if Path(backup_file).exists():
+            os.remove(backup_file)
+        
         return True
         
     except Exception as e:
@@ -182,6 +387,60 @@ def test_backup():
         traceback.print_exc()
         return False
 
+def test_manifest_format():
+    """Test writing and reading backup manifests"""
+    print("\n📜 Testing Manifest Format...")
+    
+    try:
+        import json
+        import tempfile
+        from backend.core.backup import (
+            write_backup_manifest, read_manifest_header, iter_manifest_entries, load_backup_manifest
+        )
+        
+        manifest = {
+            "timestamp": "2024-01-01T00:00:00",
+            "root_path": "/test",
+            "plan_summary": {"total_moves": 2, "folders_created": ["Docs"]},
+            "original_state": [
+                {"original_path": "a.txt", "new_path": "Docs/a.txt", "file_hash": "sha256:aa", "size": 1},
+                {"original_path": "b.txt", "new_path": "Docs/b.txt", "file_hash": "sha256:bb", "size": 2},
+            ]
+        }
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Round trip through the JSON-lines format
+            jsonl_file = os.path.join(temp_dir, "backup_manifest.jsonl")
+            write_backup_manifest(manifest, jsonl_file)
+            header = read_manifest_header(jsonl_file)
+            entries = list(iter_manifest_entries(jsonl_file))
+            loaded = load_backup_manifest(jsonl_file)
+            print(f"✅ JSON-lines manifest: {header['entries']} entries")
+            if header["entries"] != 2 or entries != manifest["original_state"] or loaded != manifest:
+                return False
+            
+            # Each load is a separate copy of the cached manifest
+            loaded["original_state"].clear()
+            if load_backup_manifest(jsonl_file) != manifest:
+                return False
+            
+            # Manifests written as one JSON document by older versions still load
+            legacy_file = os.path.join(temp_dir, "backup_manifest.json")
+            with open(legacy_file, "w") as f:
+                json.dump(manifest, f, indent=2)
+            header = read_manifest_header(legacy_file)
+            entries = list(iter_manifest_entries(legacy_file))
+            loaded = load_backup_manifest(legacy_file)
+            print(f"✅ Legacy manifest: {header['entries']} entries")
+            if header["entries"] != 2 or entries != manifest["original_state"] or loaded != manifest:
+                return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Manifest format test failed: {e}")
+        return False
+
 def test_config():
     """Test the configuration module"""
     print("\n⚙️  Testing Configuration Module...")
@@ -207,6 +466,30 @@ def test_config():
         print(f"❌ Config test failed: {e}")
         return False
 
+def test_task_store():
+    """Test the API task store"""
+    print("\n🗃️  Testing Task Store...")
+    
+    try:
+        from backend.api.task_store import InMemoryTaskStore
+        
+        evicted = []
+        store = InMemoryTaskStore(maxsize=2, ttl=3600, on_evict=evicted.append)
+        
+        store.set("a", {"status": "completed"})
+        store.set("b", {"status": "running"})
+        store.set("c", {"status": "pending"})
+        print(f"✅ Bounded store: {len(store)} tasks, evicted {evicted}")
+        
+        store.update("b", status="failed", message="Done")
+        print(f"✅ Task updated: {store.get('b')['status']}")
+        
+        return len(store) == 2 and evicted == ["a"] and "a" not in store
+        
+    except Exception as e:
+        print(f"❌ Task store test failed: {e}")
+        return False
+
 def test_cli():
     """Test the CLI module"""
     print("\n🖥️  Testing CLI Module...")
@@ -244,21 +527,32 @@ def main():
     tests = [
         ("Scanner", test_scanner),
         ("Prompt Generator", test_prompt_generator),
+        ("Snippet Grouping", test_snippet_grouping),
         ("Organizer", test_organizer),
+        ("Move Order", test_move_order),
         ("Backup", test_backup),
+        ("Manifest Format", test_manifest_format),
         ("Configuration", test_config),
+        ("Task Store", test_task_store),
         ("CLI", test_cli)
     ]
     
+    # Run only the named tests if any are given (e.g. `python test_components.py cli`)
+    selected = {arg.lower() for arg in sys.argv[1:]}
+    tests = [(name, func) for name, func in tests if not selected or name.lower() in selected]
+    
     results = []
     
-    for name, test_func in tests:
-        try:
-            success = test_func()
-            results.append((name, success))
-        except Exception as e:
-            print(f"❌ {name} test crashed: {e}")
-            results.append((name, False))
+    try:
+        for name, test_func in tests:
+            try:
+                success = test_func()
+                results.append((name, success))
+            except Exception as e:
+                print(f"❌ {name} test crashed: {e}")
+                results.append((name, False))
+    finally:
+        remove_fixture_folder()
     
     # Summary
     print("\n" + "=" * 50)